@@ -0,0 +1,195 @@
+"""
+Benchmarks for the Vector, Line, Plane and LinearSystem hot paths.
+
+    python benchmark.py --dimensions 3 50 --equations 3 20 --batch-sizes 100 --output before.json
+    python benchmark.py --dimensions 3 50 --equations 3 20 --batch-sizes 100 --compare before.json
+
+Every case is timed --repeat times and the fastest run is kept. With
+--compare, any case that got slower than --threshold times its time in
+the earlier JSON file is reported as a regression and the exit code is 1.
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+from numeric import get_backend
+from vector import Vector
+from line import Line
+from plane import Plane
+from hyperplane import Hyperplane
+from linsys import LinearSystem
+
+SEED = 1
+
+
+def random_vector(dimension, backend):
+    return Vector([random.uniform(-10, 10) for _ in range(dimension)], backend)
+
+
+def random_system(num_equations, backend):
+    row_class = Plane if num_equations == 3 else Hyperplane
+    return LinearSystem([row_class(normal_vector=random_vector(num_equations, backend),
+                                   constant_term=random.uniform(-10, 10), backend=backend)
+                         for _ in range(num_equations)])
+
+
+def vector_cases(dimension, batch_size, backend):
+    """
+    a Vector keeps its magnitude and unit vector once worked out, so the
+    cases that use them get new Vectors, made outside the timing, for every
+    run instead of timing cache lookups after the first one
+    """
+    vs = [random_vector(dimension, backend) for _ in range(batch_size)]
+    ws = [random_vector(dimension, backend) for _ in range(batch_size)]
+    pairs = list(zip(vs, ws))
+
+    def fresh_pairs():
+        return ([(Vector(v.coordinates, backend), Vector(w.coordinates, backend)) for v, w in pairs],)
+
+    return {
+        'vector_add': lambda: [v + w for v, w in pairs],
+        'vector_dot': lambda: [v.dot(w) for v, w in pairs],
+        'vector_magnitude': (fresh_pairs, lambda fresh: [v.magnitude() for v, _ in fresh]),
+        'vector_normalize': (fresh_pairs, lambda fresh: [v.normalize() for v, _ in fresh]),
+        'vector_angle': (fresh_pairs, lambda fresh: [v.angle(w) for v, w in fresh]),
+        'vector_is_parallel_to': (fresh_pairs, lambda fresh: [v.is_parallel_to(w) for v, w in fresh]),
+    }
+
+
+def geometry_cases(batch_size, backend):
+    """
+    new Lines and Planes for every run too, as their basepoints and their
+    normal vectors' magnitudes are kept once worked out
+    """
+    lines = [(Line(random_vector(2, backend), random.uniform(-10, 10)),
+              Line(random_vector(2, backend), random.uniform(-10, 10))) for _ in range(batch_size)]
+    planes = []
+    for _ in range(batch_size):
+        p = Plane(random_vector(3, backend), random.uniform(-10, 10))
+        planes.append((p, p * random.choice([1, 2, -3])))
+
+    def fresh(pairs, row_class):
+        def copies():
+            return ([tuple([row_class(Vector(h.normal_vector.coordinates, backend), h.constant_term, backend)
+                            for h in pair]) for pair in pairs],)
+        return copies
+
+    return {
+        'line_intersection_with': (fresh(lines, Line), lambda fresh: [a.intersection_with(b) for a, b in fresh]),
+        'plane_eq': (fresh(planes, Plane), lambda fresh: [a == b for a, b in fresh]),
+    }
+
+
+def system_cases(num_equations, backend):
+    s = random_system(num_equations, backend)
+    return {
+        'compute_triangular_form': s.compute_triangular_form,
+        'compute_rref': s.compute_rref,
+        'solve_system': s.solve_system,
+    }
+
+
+def best_time(fn, repeat):
+    """
+    the fastest of repeat runs of fn. fn can also be a (setup, fn) pair, in
+    which case every run times fn(*setup()) without the setup.
+    """
+    setup = None
+    if isinstance(fn, tuple):
+        setup, fn = fn
+    best = None
+    for _ in range(repeat):
+        args = setup() if setup is not None else ()
+        start = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def run(dimensions, equations, batch_sizes, backend, repeat):
+    random.seed(SEED)
+    backend = get_backend(backend)
+    results = {}
+
+    def record(name, params, fn):
+        key = '{}[{}]'.format(name, ','.join('{}={}'.format(k, params[k]) for k in sorted(params)))
+        results[key] = {'name': name, 'params': params, 'seconds': best_time(fn, repeat)}
+
+    for batch_size in batch_sizes:
+        for dimension in dimensions:
+            for name, fn in sorted(vector_cases(dimension, batch_size, backend).items()):
+                record(name, {'dimension': dimension, 'batch_size': batch_size}, fn)
+        for name, fn in sorted(geometry_cases(batch_size, backend).items()):
+            record(name, {'batch_size': batch_size}, fn)
+
+    for num_equations in equations:
+        for name, fn in sorted(system_cases(num_equations, backend).items()):
+            record(name, {'equations': num_equations}, fn)
+
+    return {
+        'meta': {
+            'backend': backend.name,
+            'repeat': repeat,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """
+    returns the cases that are more than threshold times slower than in baseline
+    """
+    regressions = []
+    for key, result in sorted(report['results'].items()):
+        before = baseline.get('results', {}).get(key)
+        if before is None or not before['seconds']:
+            continue
+        ratio = result['seconds'] / before['seconds']
+        if ratio > threshold:
+            regressions.append({'case': key, 'before': before['seconds'], 'after': result['seconds'], 'ratio': ratio})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dimensions', type=int, nargs='+', default=[3, 50], help='vector dimensions')
+    parser.add_argument('--equations', type=int, nargs='+', default=[3, 20], help='equations (and unknowns) per system')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[100], help='objects per vector/geometry case')
+    parser.add_argument('--backend', default='decimal', help='numeric backend: decimal, float or fraction')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per case, the fastest is kept')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--compare', help='earlier JSON report to check for regressions against')
+    parser.add_argument('--threshold', type=float, default=1.2, help='slowdown ratio that counts as a regression')
+    args = parser.parse_args(argv)
+
+    report = run(args.dimensions, args.equations, args.batch_sizes, args.backend, args.repeat)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        report['regressions'] = regressions
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    for r in regressions:
+        sys.stderr.write('REGRESSION {case}: {before:.6f}s -> {after:.6f}s ({ratio:.2f}x)\n'.format(**r))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
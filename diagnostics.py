@@ -0,0 +1,269 @@
+"""
+How far to trust a solution: its residual and an estimate of the condition number.
+
+residual            max |b - A x| relative to max |A| |x| + max |b| (infinity
+                    norms), for the unique solution or the basepoint of a
+                    parametrization. Around 1e-16 on the float backend means
+                    the elimination did as well as float64 can.
+condition estimate  ||A||_1 times an estimate of ||A^-1||_1, for square
+                    systems: Hager's method with Higham's refinements, which
+                    climbs from one +-1 sign vector to the next, solving with
+                    A and its transpose, towards the column of A^-1 with the
+                    largest 1-norm. It factors A once more, an LU with the
+                    same work as the forward half of the solve's elimination
+                    (on the float backend the same blocked panels, see
+                    forward_eliminate_array), and then only does O(n^2)
+                    work per step, for at most MAX_ESTIMATE_STEPS steps.
+                    Measured on a 1500 x 1500 float system, it adds about
+                    80% to the time of the solve. The estimate is a lower bound and nearly always
+                    within a factor of 3 of the true value. Infinite if the
+                    square system is singular.
+
+Roughly, a solution loses log10(condition estimate) digits, so on the float
+backend anything past 1e8 or so has half its digits gone.
+"""
+
+from math import inf
+
+from sparse import SparseRow
+from elimination import np, use_arrays, factor_panel, BLOCK_SIZE
+
+MAX_ESTIMATE_STEPS = 5
+
+
+def residual(rows, dimension, x, backend):
+    """
+    the relative residual of x for an augmented matrix (dense or sparse rows)
+    """
+    if use_arrays(backend) and rows and not isinstance(rows[0], SparseRow):
+        a = np.array(rows, dtype=np.float64)
+        coefficients, constants = a[:, :dimension], a[:, dimension]
+        largest = float(np.abs(constants - coefficients.dot(np.array(x, dtype=np.float64))).max())
+        scale = float(np.abs(coefficients).sum(axis=1).max() * max([abs(v) for v in x] or [0.0]) +
+                      np.abs(constants).max())
+        return largest / scale if scale else 0.0
+
+    norm_a, norm_b = norms(rows, dimension, backend)
+    return relative_residual(residual_vector(rows, dimension, x, backend), x, norm_a, norm_b, backend)
+
+
+def residual_vector(rows, dimension, x, backend):
+    """
+    b - A x, in the backend's numbers
+    """
+    r = []
+    for row in rows:
+        total = backend.zero
+        for k, v in _terms(row, dimension):
+            total += v * x[k]
+        r.append(row[-1] - total)
+    return r
+
+
+def norms(rows, dimension, backend):
+    """
+    the infinity norms of the coefficients and of the constant terms
+    """
+    norm_a = backend.zero
+    norm_b = backend.zero
+    for row in rows:
+        norm_a = max(norm_a, sum([abs(v) for k, v in _terms(row, dimension)], backend.zero))
+        norm_b = max(norm_b, abs(row[-1]))
+    return norm_a, norm_b
+
+
+def relative_residual(r, x, norm_a, norm_b, backend):
+    """
+    max |r| relative to norm_a max |x| + norm_b, given r = b - A x and the
+    norms of A and b
+    """
+    scale = norm_a * max([abs(v) for v in x] or [backend.zero]) + norm_b
+    if scale == 0:
+        return 0.0
+    return float(max([abs(v) for v in r] or [backend.zero]) / scale)
+
+
+def _terms(row, dimension):
+    if isinstance(row, SparseRow):
+        return [(k, v) for k, v in row.items() if k != -1]
+    return enumerate(row[:dimension])
+
+
+def condition_estimate(rows, dimension, backend):
+    """
+    ||A||_1 * an estimate of ||A^-1||_1 for the square coefficient matrix
+    of the dense augmented matrix rows
+    """
+    if use_arrays(backend):
+        a = np.array(rows, dtype=np.float64)[:, :dimension]
+        norm_a = float(np.abs(a).sum(axis=0).max()) if dimension else 0.0
+        factors = _lu_factor_array(a, backend.tolerance)
+        solve = _lu_solve_array
+    else:
+        column_sums = [0.0] * dimension
+        for row in rows:
+            for k in range(dimension):
+                column_sums[k] += abs(float(row[k]))
+        norm_a = max(column_sums or [0.0])
+        factors = _lu_factor([row[:dimension] for row in rows], backend)
+        solve = _lu_solve
+    if factors is None:
+        return inf
+    return norm_a * inverse_norm_estimate(lambda v, transpose=False: solve(factors, v, transpose),
+                                          dimension, backend)
+
+
+def inverse_norm_estimate(solve, dimension, backend):
+    """
+    a lower bound on ||A^-1||_1 that is nearly always close to it, given
+    solve(v) = A^-1 v and solve(v, transpose=True) = A^-T v (Higham's
+    version of Hager's estimator, as in LAPACK's xLACON)
+    """
+    n = dimension
+    if n == 0:
+        return 0.0
+    one = backend.one
+    x = [one / backend.coerce(n)] * n
+    estimate = 0.0
+    previous_column = None
+    for step in range(MAX_ESTIMATE_STEPS):
+        y = solve(x)
+        new_estimate = sum([abs(float(v)) for v in y])
+        if step > 0 and new_estimate <= estimate:
+            break
+        estimate = new_estimate
+        signs = [one if v >= 0 else -one for v in y]
+        z = solve(signs, transpose=True)
+        column = max(range(n), key=lambda k: abs(z[k]))
+        if step > 0 and (column == previous_column or
+                         abs(float(z[column])) <= sum([float(a * b) for a, b in zip(z, x)])):
+            break
+        x = [backend.zero] * n
+        x[column] = one
+        previous_column = column
+
+    # a vector of growing alternating entries catches the matrices the
+    # sign vector climb is known to be fooled by
+    if n > 1:
+        alternating = [backend.coerce((-1) ** i * (1 + i / (n - 1))) for i in range(n)]
+        alternating_estimate = 2 * sum([abs(float(v)) for v in solve(alternating)]) / (3 * n)
+        estimate = max(estimate, alternating_estimate)
+    return estimate
+
+
+def _lu_factor(a, backend):
+    """
+    PA = LU with partial pivoting, in place on the list of rows a, L below
+    the diagonal (its unit diagonal not stored) and U on and above it.
+    returns (a, perm) with row i of PA being row perm[i] of A, or None if A
+    is singular
+    """
+    n = len(a)
+    perm = list(range(n))
+    for k in range(n):
+        p = max(range(k, n), key=lambda r: abs(a[r][k]))
+        if backend.is_near_zero(a[p][k]):
+            return None
+        a[k], a[p] = a[p], a[k]
+        perm[k], perm[p] = perm[p], perm[k]
+        pivot_row = a[k]
+        for row in a[k + 1:]:
+            multiple = row[k] / pivot_row[k]
+            row[k] = multiple
+            if multiple != 0:
+                for j in range(k + 1, n):
+                    row[j] -= multiple * pivot_row[j]
+    return a, perm
+
+
+def _lu_solve(factors, b, transpose=False):
+    a, perm = factors
+    n = len(a)
+    if not transpose:
+        # L U x = P b
+        y = [b[perm[i]] for i in range(n)]
+        for i in range(n):
+            for j in range(i):
+                y[i] -= a[i][j] * y[j]
+        for i in reversed(range(n)):
+            for j in range(i + 1, n):
+                y[i] -= a[i][j] * y[j]
+            y[i] = y[i] / a[i][i]
+        return y
+
+    # A^T = U^T L^T P, so solve U^T w = b, then L^T v = w, then x = P^T v
+    w = list(b)
+    for i in range(n):
+        for j in range(i):
+            w[i] -= a[j][i] * w[j]
+        w[i] = w[i] / a[i][i]
+    for i in reversed(range(n)):
+        for j in range(i + 1, n):
+            w[i] -= a[j][i] * w[j]
+    x = [None] * n
+    for i in range(n):
+        x[perm[i]] = w[i]
+    return x
+
+
+def _lu_factor_array(a, tolerance):
+    """
+    _lu_factor for a float64 array, BLOCK_SIZE columns at a time with the
+    elimination's own factor_panel: each panel is factored column by
+    column, then the rest of the matrix gets its row operations as one
+    matrix product
+    """
+    n = a.shape[0]
+    perm = np.arange(n)
+    for col in range(0, n, BLOCK_SIZE):
+        stop = min(col + BLOCK_SIZE, n)
+        swaps, multipliers, panel_pivots = factor_panel(a[col:, col:stop], tolerance)
+        if len(panel_pivots) < stop - col:
+            return None
+        for i, j in swaps:
+            i, j = col + i, col + j
+            a[[i, j], :col] = a[[j, i], :col]
+            a[[i, j], stop:] = a[[j, i], stop:]
+            perm[[i, j]] = perm[[j, i]]
+        top = a[col:stop, stop:]
+        for i in range(1, stop - col):
+            top[i] -= multipliers[i, :i].dot(top[:i])
+        a[stop:, stop:] -= multipliers[stop - col:].dot(top)
+        # factor_panel leaves zeros below the pivots, L goes there
+        a[col:, col:stop] += np.tril(multipliers, -1)
+    return a, perm
+
+
+def _lu_solve_array(factors, b, transpose=False):
+    """
+    _lu_solve for _lu_factor_array's factors, substituting BLOCK_SIZE
+    unknowns at a time
+    """
+    a, perm = factors
+    n = a.shape[0]
+    b = np.array(b, dtype=np.float64)
+    blocks = [(start, min(start + BLOCK_SIZE, n)) for start in range(0, n, BLOCK_SIZE)]
+    if not transpose:
+        y = b[perm]
+        for start, stop in blocks:
+            y[start:stop] -= a[start:stop, :start].dot(y[:start])
+            y[start:stop] = np.linalg.solve(_unit_lower(a[start:stop, start:stop]), y[start:stop])
+        for start, stop in reversed(blocks):
+            y[start:stop] -= a[start:stop, stop:].dot(y[stop:])
+            y[start:stop] = np.linalg.solve(np.triu(a[start:stop, start:stop]), y[start:stop])
+        return y.tolist()
+
+    w = b
+    for start, stop in blocks:
+        w[start:stop] -= a[:start, start:stop].T.dot(w[:start])
+        w[start:stop] = np.linalg.solve(np.triu(a[start:stop, start:stop]).T, w[start:stop])
+    for start, stop in reversed(blocks):
+        w[start:stop] -= a[stop:, start:stop].T.dot(w[stop:])
+        w[start:stop] = np.linalg.solve(_unit_lower(a[start:stop, start:stop]).T, w[start:stop])
+    x = np.empty(n)
+    x[perm] = w
+    return x.tolist()
+
+
+def _unit_lower(block):
+    return np.tril(block, -1) + np.eye(len(block))
@@ -0,0 +1,332 @@
+"""
+Linear systems too big for memory, kept in a file and eliminated a block at a time.
+
+The file is the raw binary format of loaders.py: the augmented matrix as
+row-major little-endian float64, dimension + 1 values per equation. It is
+memory-mapped, and the elimination only ever holds about working_set bytes
+of it in memory at once:
+
+forward elimination goes a panel of columns at a time. The panel (every
+row not yet used as a pivot, those columns only) is read and factored in
+memory with partial pivoting, the chosen rows are swapped on disk, and the
+rest of the matrix to the right of the panel is updated in blocks of rows,
+one matrix product per block.
+
+back substitution goes a block of pivot rows at a time, from the bottom.
+The block is reduced in memory, then subtracted from the rows above it in
+blocks of rows, again one matrix product per block.
+
+Everything is float64, so these systems always use the float backend.
+"""
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from numeric import get_backend
+from vector import Vector
+from hyperplane import Hyperplane
+from linsys import LinearSystem
+from loaders import write_binary
+from elimination import BLOCK_SIZE, factor_panel, reduce_block
+from solution import NoSolution, UniqueSolution, Parametrization
+
+DTYPE = '<f8'
+DEFAULT_WORKING_SET = 256 * 1024 * 1024
+
+
+class DiskLinearSystem(LinearSystem):
+    """
+    a LinearSystem whose augmented matrix lives in the file at path.
+
+    Row operations, indexing and assignment read and write single rows of the
+    file. copy, compute_triangular_form and compute_rref write their result
+    to a new file (output, or a temporary file next to this one) and return
+    it as another DiskLinearSystem. That file belongs to the caller, who
+    removes it with delete() once done with it; compute_solution and
+    solve_system clean up after themselves. planes builds every equation
+    as a Hyperplane, so only ask for it on systems that fit in memory.
+
+    The methods LinearSystem also has take its parameters in its order,
+    with output after them.
+    """
+
+    WRONG_FILE_SIZE_MSG = 'File size is not a whole number of equations'
+    ONLY_PARTIAL_PIVOTING_MSG = 'Out-of-core elimination only does partial pivoting'
+
+    def __init__(self, path, dimension, working_set=DEFAULT_WORKING_SET, mode='r+'):
+        width = dimension + 1
+        if os.path.getsize(path) % (width * np.dtype(DTYPE).itemsize):
+            raise Exception(self.WRONG_FILE_SIZE_MSG)
+        self.path = path
+        self.dimension = dimension
+        self.working_set = working_set
+        self.backend = get_backend('float')
+        self._matrix = np.memmap(path, dtype=DTYPE, mode=mode).reshape(-1, width)
+        self._planes = None
+        self._row_class = Hyperplane
+        self._factorization = None
+
+    @classmethod
+    def create(cls, path, num_equations, dimension, working_set=DEFAULT_WORKING_SET):
+        """
+        a new file of num_equations all-zero equations, to be filled in
+        through matrix
+        """
+        matrix = np.memmap(path, dtype=DTYPE, mode='w+', shape=(num_equations, dimension + 1))
+        matrix.flush()
+        del matrix
+        return cls(path, dimension, working_set)
+
+    @classmethod
+    def from_chunks(cls, chunks, path, dimension=None, working_set=DEFAULT_WORKING_SET):
+        """
+        a new file of the augmented matrix rows in chunks (lists of rows, as
+        the loaders.iter_* readers yield them), written one chunk at a time,
+        so only one chunk is ever in memory
+        """
+        with open(path, 'wb') as f:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                if dimension is None:
+                    dimension = len(chunk[0]) - 1
+                values = np.array(chunk, dtype=DTYPE)
+                if values.ndim != 2 or values.shape[1] != dimension + 1:
+                    raise Exception(cls.WRONG_FILE_SIZE_MSG)
+                f.write(values.tobytes())
+        return cls(path, dimension or 0, working_set)
+
+    @classmethod
+    def from_system(cls, system, path, working_set=DEFAULT_WORKING_SET):
+        write_binary(system, path, DTYPE)
+        return cls(path, system.dimension, working_set)
+
+    @property
+    def matrix(self):
+        return self._matrix
+
+    @property
+    def planes(self):
+        return [self[i] for i in range(len(self))]
+
+    def flush(self):
+        self._matrix.flush()
+
+    def swap_rows(self, row1, row2):
+        self._matrix[[row1, row2]] = self._matrix[[row2, row1]]
+        self._factorization = None
+
+    def multiply_coefficient_and_row(self, coefficient, row):
+        self._matrix[row] *= float(coefficient)
+        self._factorization = None
+
+    def add_multiple_times_row_to_row(self, coefficient, row_to_add, row_to_be_added_to):
+        self._matrix[row_to_be_added_to] += float(coefficient) * self._matrix[row_to_add]
+        self._factorization = None
+
+    def __len__(self):
+        return self._matrix.shape[0]
+
+    def __getitem__(self, i):
+        row = self._matrix[i].tolist()
+        return Hyperplane._from_internal(Vector(row[:-1], self.backend), row[-1])
+
+    def __setitem__(self, i, x):
+        if x.dimension != self.dimension:
+            raise Exception(self.ALL_PLANES_MUST_BE_IN_SAME_DIM_MSG)
+        self._matrix[i, :-1] = [float(v) for v in x.normal_vector.coordinates]
+        self._matrix[i, -1] = float(x.constant_term)
+        self._factorization = None
+
+    def copy(self, output=None):
+        """
+        a copy of the file (at output, or a temporary file next to this one)
+        as another DiskLinearSystem
+        """
+        return self._copy(output)
+
+    def delete(self):
+        """
+        removes the file, after which this system can no longer be used
+        """
+        del self._matrix
+        os.remove(self.path)
+
+    def compute_triangular_form(self, pivoting='partial', in_place=False, output=None):
+        """
+        row echelon form, with partial pivoting rather than the first
+        nonzero row, since that is what keeps a blocked elimination stable.
+        in_place=True eliminates this system's own file instead of a copy
+        and returns self.
+        """
+        self._check_pivoting(pivoting)
+        result = self if in_place else self._copy(output)
+        forward_eliminate_blocks(result._matrix, self.dimension, self.backend.tolerance, self.working_set)
+        result._factorization = None
+        result.flush()
+        return result
+
+    def compute_rref(self, pivoting='partial', in_place=False, output=None):
+        self._check_pivoting(pivoting)
+        result = self if in_place else self._copy(output)
+        result._reduce()
+        result._factorization = None
+        result.flush()
+        return result
+
+    def compute_solution(self, pivoting='partial', check=False):
+        """
+        with check=True the solution carries its residual, computed a block
+        of rows at a time. There is no condition estimate out of core.
+        """
+        self._check_pivoting(pivoting)
+        result = self._copy(None)
+        try:
+            pivots = result._reduce()
+            solution = result._read_solution(pivots)
+        finally:
+            result.delete()
+        if check and solution.is_consistent:
+            x = solution.vector if solution.is_unique else solution.basepoint
+            solution.residual = self._residual(np.array(x.coordinates))
+        return solution
+
+    def _residual(self, x):
+        matrix = self._matrix
+        n = self.dimension
+        largest = norm_a = norm_b = 0.0
+        for start, stop in _row_blocks(0, len(matrix), matrix.shape[1], self.working_set):
+            block = np.array(matrix[start:stop])
+            largest = max(largest, np.abs(block[:, n] - block[:, :n].dot(x)).max())
+            norm_a = max(norm_a, np.abs(block[:, :n]).sum(axis=1).max())
+            norm_b = max(norm_b, np.abs(block[:, n]).max())
+        scale = norm_a * np.abs(x).max() + norm_b if len(x) else norm_b
+        return float(largest / scale) if scale else 0.0
+
+    def _check_pivoting(self, pivoting):
+        if pivoting != 'partial':
+            raise Exception('{}: {}'.format(self.ONLY_PARTIAL_PIVOTING_MSG, pivoting))
+
+    def _copy(self, output):
+        self.flush()
+        if output is None:
+            handle, output = tempfile.mkstemp(suffix='.bin', dir=os.path.dirname(os.path.abspath(self.path)))
+            os.close(handle)
+        shutil.copyfile(self.path, output)
+        return DiskLinearSystem(output, self.dimension, self.working_set)
+
+    def _reduce(self):
+        tolerance = self.backend.tolerance
+        pivots = forward_eliminate_blocks(self._matrix, self.dimension, tolerance, self.working_set)
+        back_substitute_blocks(self._matrix, pivots, self.working_set)
+        return pivots
+
+    def _read_solution(self, pivots):
+        """
+        the Solution of an RREF on disk, reading it a block of rows at a time
+        """
+        matrix = self._matrix
+        rank = len(pivots)
+        n = self.dimension
+        tolerance = self.backend.tolerance
+        for start, stop in _row_blocks(rank, len(matrix), matrix.shape[1], self.working_set):
+            if (np.abs(matrix[start:stop, -1]) >= tolerance).any():
+                return NoSolution(n, pivots)
+
+        basepoint = [0.0] * n
+        for i, col in enumerate(pivots):
+            basepoint[col] = float(matrix[i, -1])
+        if rank == n:
+            return UniqueSolution(n, pivots, Vector(basepoint, self.backend))
+
+        free_variables = [col for col in range(n) if col not in set(pivots)]
+        direction_vectors = [[0.0] * n for _ in free_variables]
+        for d, col in zip(direction_vectors, free_variables):
+            d[col] = 1.0
+        for start, stop in _row_blocks(0, rank, matrix.shape[1], self.working_set):
+            block = matrix[start:stop][:, free_variables]
+            for i, row in enumerate(block.tolist(), start):
+                for d, value in zip(direction_vectors, row):
+                    d[pivots[i]] = -value
+        return Parametrization(n, pivots, Vector(basepoint, self.backend),
+                               [Vector(d, self.backend) for d in direction_vectors])
+
+
+def forward_eliminate_blocks(matrix, num_variables, tolerance, working_set=DEFAULT_WORKING_SET):
+    """
+    forward elimination with partial pivoting on a (memory-mapped) float64
+    array, in place, holding about working_set bytes of it at a time.
+    returns the pivot columns, pivot row i leading with pivots[i].
+    """
+    num_rows, width = matrix.shape
+    itemsize = matrix.dtype.itemsize
+    budget = max(1, working_set // 3 // itemsize)
+    pivots = []
+    pivot_row = 0
+    col = 0
+    while col < num_variables and pivot_row < num_rows:
+        remaining = num_rows - pivot_row
+        panel_width = max(1, min(BLOCK_SIZE, num_variables - col, budget // remaining, budget // width))
+        stop = col + panel_width
+
+        panel = np.array(matrix[pivot_row:, col:stop])
+        swaps, multipliers, panel_pivots = factor_panel(panel, tolerance)
+        for a, b in swaps:
+            matrix[[pivot_row + a, pivot_row + b]] = matrix[[pivot_row + b, pivot_row + a]]
+        matrix[pivot_row:, col:stop] = panel
+
+        count = len(panel_pivots)
+        if count and stop < width:
+            # the pivot rows first: undo what the panel did to them, then
+            # every row below in blocks
+            top = np.array(matrix[pivot_row:pivot_row + count, stop:])
+            for i in range(1, count):
+                top[i] -= multipliers[i, :i].dot(top[:i])
+            matrix[pivot_row:pivot_row + count, stop:] = top
+            for start, end in _row_blocks(pivot_row + count, num_rows, width - stop, working_set // 3):
+                block = np.array(matrix[start:end, stop:])
+                block -= multipliers[start - pivot_row:end - pivot_row].dot(top)
+                matrix[start:end, stop:] = block
+
+        pivots.extend(col + j for j in panel_pivots)
+        pivot_row += count
+        col = stop
+
+    return pivots
+
+
+def back_substitute_blocks(matrix, pivots, working_set=DEFAULT_WORKING_SET):
+    """
+    turns a row echelon form (from forward_eliminate_blocks) into the RREF,
+    in place, a block of pivot rows at a time from the bottom up
+    """
+    width = matrix.shape[1]
+    block_rows = max(1, working_set // 3 // (width * matrix.dtype.itemsize))
+    stop = len(pivots)
+    while stop > 0:
+        start = max(0, stop - block_rows)
+        block = np.array(matrix[start:stop])
+        columns = pivots[start:stop]
+        reduce_block(block, columns)
+        matrix[start:stop] = block
+
+        # the block is the identity in its pivot columns, so this clears them
+        for above_start, above_stop in _row_blocks(0, start, width, working_set // 3):
+            above = np.array(matrix[above_start:above_stop])
+            above -= above[:, columns].dot(block)
+            above[:, columns] = 0
+            matrix[above_start:above_stop] = above
+        stop = start
+
+
+def _row_blocks(start, stop, width, working_set):
+    """
+    (start, stop) ranges covering rows start..stop, each about working_set
+    bytes of float64 rows width values wide
+    """
+    step = max(1, working_set // (width * 8))
+    for i in range(start, stop, step):
+        yield i, min(i + step, stop)
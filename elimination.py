@@ -0,0 +1,495 @@
+"""
+Gaussian elimination on a dense augmented coefficient matrix.
+
+A matrix here is a plain list of rows, each row being the coefficients of
+one equation followed by its constant term, all in the numbers of a single
+numeric backend. Every function works in place: rows are swapped and
+updated inside the list, nothing gets copied or rebuilt per row operation.
+
+On the float backend, when NumPy is installed, row_echelon_form and
+reduced_row_echelon_form run the same algorithm on a float64 array instead,
+blocked so that almost all of the work is matrix products (BLAS), which
+keeps systems with thousands of unknowns down to seconds.
+
+Systems made only of SparseHyperplane rows get a sparse augmented matrix
+(see sparse.py), and the same two entry points eliminate it sparsely.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import profiling
+from sparse import SparseRow, SparseHyperplane, sparse_forward_eliminate, sparse_reduced_row_echelon_form
+
+PIVOTING_STRATEGIES = ('none', 'partial', 'scaled-partial', 'complete')
+UNKNOWN_PIVOTING_MSG = 'Unknown pivoting strategy'
+
+# columns per panel, and pivot rows per block in back substitution
+BLOCK_SIZE = 64
+
+
+def augmented_matrix(planes):
+    if planes and all(isinstance(p, SparseHyperplane) for p in planes):
+        return [p.sparse_row() for p in planes]
+    return [list(p.normal_vector.coordinates) + [p.constant_term] for p in planes]
+
+
+def copy_rows(rows):
+    if rows and isinstance(rows[0], SparseRow):
+        return [SparseRow(row.zero, row) for row in rows]
+    return [list(row) for row in rows]
+
+
+def choose_pivot(rows, start_row, col, backend, pivoting='partial', scales=None):
+    """
+    returns the row (at or after start_row) to pivot on for column col,
+    or None if that column has nothing left to eliminate with.
+
+    'none' takes the first row with a nonzero entry, the same rule
+    compute_triangular_form has always used.
+    'partial' takes the row with the largest entry in absolute value.
+    'scaled-partial' takes the row whose entry is largest relative to the
+    largest coefficient that row started with (scales, see row_scales), so
+    an equation that was just multiplied by a big number does not win.
+    """
+    if pivoting == 'none':
+        for r in range(start_row, len(rows)):
+            if not backend.is_near_zero(rows[r][col]):
+                return r
+        return None
+
+    if pivoting in ('partial', 'scaled-partial'):
+        best, best_value = None, None
+        for r in range(start_row, len(rows)):
+            value = abs(rows[r][col])
+            if backend.is_near_zero(value):
+                continue
+            if scales is not None:
+                value = value / scales[r]
+            if best is None or value > best_value:
+                best, best_value = r, value
+        return best
+
+    raise Exception('{}: {}'.format(UNKNOWN_PIVOTING_MSG, pivoting))
+
+
+def row_scales(rows, num_variables, backend):
+    """
+    the largest coefficient of each row in absolute value (1 for a row with none)
+    """
+    scales = []
+    for row in rows:
+        scale = max(abs(row[k]) for k in range(num_variables)) if num_variables else 0
+        scales.append(scale if scale != 0 else backend.one)
+    return scales
+
+
+def forward_eliminate(rows, num_variables, backend, pivoting='partial'):
+    """
+    reduces rows to row echelon form in place.
+
+    returns the pivot column of each pivot row; pivot rows come first, in
+    order, and every row after them has only (near) zero coefficients left.
+    """
+    scales = row_scales(rows, num_variables, backend) if pivoting == 'scaled-partial' else None
+    profile = profiling.current()
+    pivots = []
+    pivot_row = 0
+    for col in range(num_variables):
+        if pivot_row == len(rows):
+            break
+
+        with profiling.phase('pivot search'):
+            r = choose_pivot(rows, pivot_row, col, backend, pivoting, scales)
+        if r is None:
+            # this variable is already eliminated from every remaining row
+            continue
+        if r != pivot_row:
+            rows[r], rows[pivot_row] = rows[pivot_row], rows[r]
+            if scales is not None:
+                scales[r], scales[pivot_row] = scales[pivot_row], scales[r]
+            if profile is not None:
+                profile.count('row swaps')
+
+        pivot = rows[pivot_row]
+        pivot_value = pivot[col]
+        # only the columns where the pivot row is nonzero can change
+        nonzero = [k for k in range(col + 1, len(pivot)) if pivot[k] != 0]
+
+        updated = 0
+        for row in rows[pivot_row + 1:]:
+            value = row[col]
+            if value != 0 and not backend.is_near_zero(value):
+                multiple = value / pivot_value
+                for k in nonzero:
+                    row[k] -= multiple * pivot[k]
+                updated += 1
+            row[col] = backend.zero
+        if profile is not None:
+            _count_row_operations(profile, backend, updated, 1 + 2 * len(nonzero))
+
+        pivots.append(col)
+        pivot_row += 1
+
+    return pivots
+
+
+def back_substitute(rows, pivots, backend):
+    """
+    takes rows in row echelon form (as left by forward_eliminate) to reduced
+    row echelon form in place: every pivot becomes 1 and is the only nonzero
+    entry in its column.
+    """
+    profile = profiling.current()
+    num_columns = len(rows[0]) if rows else 0
+    for i in reversed(range(len(pivots))):
+        col = pivots[i]
+        row = rows[i]
+
+        pivot_value = row[col]
+        if pivot_value != 1:
+            for k in range(col + 1, num_columns):
+                row[k] = row[k] / pivot_value
+            row[col] = backend.one
+            if profile is not None:
+                profile.count('row scalings')
+                profile.count('{} operations'.format(backend.name), num_columns - col - 1)
+
+        nonzero = [k for k in range(col + 1, num_columns) if row[k] != 0]
+        updated = 0
+        for above in rows[:i]:
+            value = above[col]
+            if value != 0:
+                for k in nonzero:
+                    above[k] -= value * row[k]
+                above[col] = backend.zero
+                updated += 1
+        if profile is not None:
+            _count_row_operations(profile, backend, updated, 2 * len(nonzero))
+
+
+def _count_row_operations(profile, backend, rows, operations_per_row):
+    profile.count('row operations', rows)
+    profile.count('{} operations'.format(backend.name), rows * operations_per_row)
+
+
+def row_echelon_form(rows, num_variables, backend, pivoting='partial'):
+    """
+    returns (rows, pivots) with rows in row echelon form.
+
+    Complete pivoting picks pivots out of column order, which only comes out
+    as an echelon form once it has been fully reduced, so with 'complete'
+    this returns the RREF (which is a row echelon form too).
+    """
+    if pivoting == 'complete' and not _is_sparse(rows):
+        return reduced_row_echelon_form(rows, num_variables, backend, pivoting)
+
+    with profiling.phase('triangularization'):
+        if _is_sparse(rows):
+            pivots = sparse_forward_eliminate(rows, num_variables, backend, ordering='natural')
+            return rows, pivots
+
+        if use_arrays(backend):
+            matrix = np.array(rows, dtype=np.float64).reshape(len(rows), -1)
+            pivots = forward_eliminate_array(matrix, num_variables, backend.tolerance, pivoting)
+            return matrix.tolist(), pivots
+
+        pivots = forward_eliminate(rows, num_variables, backend, pivoting)
+        return rows, pivots
+
+
+def reduced_row_echelon_form(rows, num_variables, backend, pivoting='partial'):
+    """
+    returns (rows, pivots) with rows in reduced row echelon form
+    """
+    if _is_sparse(rows):
+        pivots = sparse_reduced_row_echelon_form(rows, num_variables, backend)
+        return rows, pivots
+
+    if pivoting == 'complete':
+        # the elimination and the back substitution are interleaved, so
+        # they are timed as one phase
+        with profiling.phase('complete pivoting'):
+            if use_arrays(backend):
+                matrix = np.array(rows, dtype=np.float64).reshape(len(rows), -1)
+                pivots = complete_pivoting_rref_array(matrix, num_variables, backend.tolerance)
+                return matrix.tolist(), pivots
+            return rows, complete_pivoting_rref(rows, num_variables, backend)
+
+    if use_arrays(backend):
+        matrix = np.array(rows, dtype=np.float64).reshape(len(rows), -1)
+        with profiling.phase('triangularization'):
+            pivots = forward_eliminate_array(matrix, num_variables, backend.tolerance, pivoting)
+        with profiling.phase('back substitution'):
+            back_substitute_array(matrix, pivots)
+        return matrix.tolist(), pivots
+
+    with profiling.phase('triangularization'):
+        pivots = forward_eliminate(rows, num_variables, backend, pivoting)
+    with profiling.phase('back substitution'):
+        back_substitute(rows, pivots, backend)
+    return rows, pivots
+
+
+def complete_pivoting_rref(rows, num_variables, backend):
+    """
+    reduced_row_echelon_form with complete pivoting, in place: every step
+    pivots on the largest coefficient left in any row and any column.
+    returns the pivot columns.
+
+    The pivots come out of column order, so every row operation spans the
+    whole row, and at the end the pivot rows are sorted by pivot column.
+    """
+    pivots = []
+    remaining = list(range(num_variables))
+    for pivot_row in range(len(rows)):
+        best, best_value = None, None
+        for r in range(pivot_row, len(rows)):
+            row = rows[r]
+            for c in remaining:
+                value = abs(row[c])
+                if best is None or value > best_value:
+                    best, best_value = (r, c), value
+        if best is None or backend.is_near_zero(best_value):
+            break
+        r, col = best
+        rows[r], rows[pivot_row] = rows[pivot_row], rows[r]
+        remaining.remove(col)
+
+        pivot = rows[pivot_row]
+        pivot_value = pivot[col]
+        nonzero = [k for k in range(len(pivot)) if pivot[k] != 0 and k != col]
+        for row in rows[pivot_row + 1:]:
+            value = row[col]
+            if value != 0 and not backend.is_near_zero(value):
+                multiple = value / pivot_value
+                for k in nonzero:
+                    row[k] -= multiple * pivot[k]
+            row[col] = backend.zero
+        pivots.append(col)
+
+    for i in reversed(range(len(pivots))):
+        col = pivots[i]
+        row = rows[i]
+        pivot_value = row[col]
+        for k in range(len(row)):
+            row[k] = row[k] / pivot_value
+        row[col] = backend.one
+        nonzero = [k for k in range(len(row)) if row[k] != 0 and k != col]
+        for above in rows[:i]:
+            value = above[col]
+            if value != 0:
+                for k in nonzero:
+                    above[k] -= value * row[k]
+                above[col] = backend.zero
+
+    order = sorted(range(len(pivots)), key=lambda i: pivots[i])
+    rows[:len(pivots)] = [rows[i] for i in order]
+    pivots = sorted(pivots)
+    if len(pivots) < num_variables and _needs_rereduction(rows, pivots, backend):
+        # rank deficient, and the pivots landed on columns the RREF would
+        # not have used. The pivot rows span the right space, so reduce them
+        # once more in column order
+        leading = rows[:len(pivots)]
+        pivots = forward_eliminate(leading, num_variables, backend)
+        back_substitute(leading, pivots, backend)
+        rows[:len(leading)] = leading
+    return pivots
+
+
+def complete_pivoting_rref_array(matrix, num_variables, tolerance):
+    """
+    complete_pivoting_rref for a float64 array, in place
+    """
+    num_rows = matrix.shape[0]
+    pivots = []
+    remaining = np.ones(num_variables, dtype=bool)
+    for pivot_row in range(num_rows):
+        candidates = np.abs(matrix[pivot_row:, :num_variables])
+        candidates[:, ~remaining] = 0
+        if not candidates.size:
+            break
+        r, col = np.unravel_index(np.argmax(candidates), candidates.shape)
+        if candidates[r, col] < tolerance:
+            break
+        r += pivot_row
+        if r != pivot_row:
+            matrix[[pivot_row, r]] = matrix[[r, pivot_row]]
+        remaining[col] = False
+
+        below = matrix[pivot_row + 1:, col]
+        multiples = below / matrix[pivot_row, col]
+        multiples[np.abs(below) < tolerance] = 0
+        matrix[pivot_row + 1:] -= np.outer(multiples, matrix[pivot_row])
+        below[:] = 0
+        pivots.append(int(col))
+
+    for i in reversed(range(len(pivots))):
+        col = pivots[i]
+        matrix[i] /= matrix[i, col]
+        matrix[i, col] = 1
+        matrix[:i] -= np.outer(matrix[:i, col], matrix[i])
+        matrix[:i, col] = 0
+
+    order = sorted(range(len(pivots)), key=lambda i: pivots[i])
+    matrix[:len(pivots)] = matrix[order]
+    pivots = sorted(pivots)
+    if len(pivots) < num_variables and any((np.abs(matrix[i, :col]) >= tolerance).any()
+                                           for i, col in enumerate(pivots)):
+        leading = matrix[:len(pivots)]
+        pivots = forward_eliminate_array(leading, num_variables, tolerance)
+        back_substitute_array(leading, pivots)
+    return pivots
+
+
+def _needs_rereduction(rows, pivots, backend):
+    """
+    whether some pivot row has a nonzero coefficient left of its pivot
+    """
+    for row, col in zip(rows, pivots):
+        if any(not backend.is_near_zero(row[k]) for k in range(col)):
+            return True
+    return False
+
+
+def _is_sparse(rows):
+    return bool(rows) and isinstance(rows[0], SparseRow)
+
+
+def use_arrays(backend):
+    return np is not None and backend.name == 'float'
+
+
+def forward_eliminate_array(matrix, num_variables, tolerance, pivoting='partial', block_size=BLOCK_SIZE):
+    """
+    forward_eliminate for a float64 array, in place, a panel of block_size
+    columns at a time: the panel is eliminated column by column, then
+    everything to its right gets all of the panel's row operations at once,
+    as one matrix product
+    """
+    num_rows = matrix.shape[0]
+    scales = None
+    if pivoting == 'scaled-partial':
+        scales = np.abs(matrix[:, :num_variables]).max(axis=1) if num_variables else np.zeros(num_rows)
+        scales[scales == 0] = 1
+    pivots = []
+    pivot_row = 0
+    col = 0
+    while col < num_variables and pivot_row < num_rows:
+        stop = min(col + block_size, num_variables)
+        panel_scales = scales[pivot_row:] if scales is not None else None
+        swaps, multipliers, panel_pivots = factor_panel(matrix[pivot_row:, col:stop], tolerance, pivoting, panel_scales)
+        profile = profiling.current()
+        if profile is not None:
+            profile.count('row swaps', len(swaps))
+        for a, b in swaps:
+            a, b = pivot_row + a, pivot_row + b
+            matrix[[a, b], :col] = matrix[[b, a], :col]
+            matrix[[a, b], stop:] = matrix[[b, a], stop:]
+
+        count = len(panel_pivots)
+        if count:
+            # the pivot rows only had the pivots above them subtracted,
+            # every row below had all of them subtracted
+            top = matrix[pivot_row:pivot_row + count, stop:]
+            for i in range(1, count):
+                top[i] -= multipliers[i, :i].dot(top[:i])
+            matrix[pivot_row + count:, stop:] -= multipliers[count:].dot(top)
+
+        pivots.extend(col + j for j in panel_pivots)
+        pivot_row += count
+        col = stop
+
+    return pivots
+
+
+def factor_panel(panel, tolerance, pivoting='partial', scales=None):
+    """
+    eliminates below the pivots of a float64 panel (some columns of the rows
+    not used as pivots yet), in place. returns the row swaps made, in order,
+    the multipliers (multipliers[i, k] times pivot row k was subtracted from
+    row i) and the panel column of each pivot.
+
+    scales, for 'scaled-partial', holds each panel row's scale and is
+    swapped along with the rows.
+    """
+    num_rows, num_columns = panel.shape
+    multipliers = np.zeros((num_rows, min(num_rows, num_columns)))
+    swaps = []
+    panel_pivots = []
+    pivot_row = 0
+    for col in range(num_columns):
+        if pivot_row == num_rows:
+            break
+
+        column = np.abs(panel[pivot_row:, col])
+        if pivoting == 'none':
+            candidates = np.flatnonzero(column >= tolerance)
+            if not len(candidates):
+                continue
+            r = pivot_row + int(candidates[0])
+        elif pivoting == 'partial':
+            r = pivot_row + int(np.argmax(column))
+            if column[r - pivot_row] < tolerance:
+                continue
+        elif pivoting == 'scaled-partial':
+            usable = column >= tolerance
+            if not usable.any():
+                continue
+            r = pivot_row + int(np.argmax(np.where(usable, column / scales[pivot_row:], -1)))
+        else:
+            raise Exception('{}: {}'.format(UNKNOWN_PIVOTING_MSG, pivoting))
+
+        if r != pivot_row:
+            panel[[pivot_row, r]] = panel[[r, pivot_row]]
+            multipliers[[pivot_row, r]] = multipliers[[r, pivot_row]]
+            if scales is not None:
+                scales[[pivot_row, r]] = scales[[r, pivot_row]]
+            swaps.append((pivot_row, r))
+
+        below = panel[pivot_row + 1:, col]
+        multiples = below / panel[pivot_row, col]
+        multiples[np.abs(below) < tolerance] = 0
+        panel[pivot_row + 1:, col + 1:] -= np.outer(multiples, panel[pivot_row, col + 1:])
+        below[:] = 0
+        multipliers[pivot_row + 1:, pivot_row] = multiples
+
+        panel_pivots.append(col)
+        pivot_row += 1
+
+    return swaps, multipliers[:, :pivot_row], panel_pivots
+
+
+def back_substitute_array(matrix, pivots, block_size=BLOCK_SIZE):
+    """
+    back_substitute for a float64 array, in place, block_size pivot rows at
+    a time from the bottom up
+    """
+    stop = len(pivots)
+    while stop > 0:
+        start = max(0, stop - block_size)
+        columns = pivots[start:stop]
+        reduce_block(matrix[start:stop], columns)
+        if start:
+            # the block is zero left of its first pivot and the identity in
+            # its pivot columns, so this clears those columns above it
+            above = matrix[:start, columns[0]:]
+            local = [c - columns[0] for c in columns]
+            above -= above[:, local].dot(matrix[start:stop, columns[0]:])
+            above[:, local] = 0
+        stop = start
+
+
+def reduce_block(block, columns):
+    """
+    back substitution within one block of consecutive pivot rows, row i
+    leading with columns[i]
+    """
+    for i in reversed(range(len(block))):
+        col = columns[i]
+        block[i, col + 1:] /= block[i, col]
+        block[i, col] = 1
+        block[:i, col + 1:] -= np.outer(block[:i, col], block[i, col + 1:])
+        block[:i, col] = 0
@@ -0,0 +1,88 @@
+"""
+Factor a system's coefficients once, then solve for many constant terms.
+
+Reducing the coefficients augmented with the identity, [A | I], to RREF
+gives [R | M], where M is every row operation of the elimination folded into
+one matrix. For any constant terms b, M b is exactly the constant column
+the RREF of [A | b] would have ended up with, so each new right-hand side
+costs one matrix-vector product instead of a fresh O(n^3) elimination.
+"""
+
+from elimination import reduced_row_echelon_form, np, use_arrays
+from solution import INCONSISTENT, INFINITELY_MANY
+
+
+class Factorization(object):
+
+    WRONG_NUMBER_OF_CONSTANTS_MSG = 'Expected one constant term per equation'
+
+    def __init__(self, system):
+        backend = system.backend
+        num_rows = len(system)
+        num_variables = system.dimension
+
+        rows = []
+        for i, row in enumerate(system._matrix_rows()):
+            identity_row = [backend.zero] * num_rows
+            identity_row[i] = backend.one
+            rows.append([row[k] for k in range(num_variables)] + identity_row)
+
+        rows, pivots = reduced_row_echelon_form(rows, num_variables, backend)
+
+        self.backend = backend
+        self.num_rows = num_rows
+        self.dimension = num_variables
+        self.pivots = pivots
+        self.rank = len(pivots)
+        self.transform = [row[num_variables:] for row in rows]
+        if use_arrays(backend):
+            self.transform = np.array(self.transform, dtype=np.float64).reshape(num_rows, num_rows)
+
+    def solve(self, constant_terms):
+        """
+        the same result solve_system would give for this system
+        with its constant terms replaced by constant_terms
+        """
+        return self.solve_many([constant_terms])[0]
+
+    def solve_many(self, batch):
+        """
+        solves for every set of constant terms in batch, one result per set,
+        each reported the way solve_system reports it.
+        """
+        if not len(batch):
+            return []
+
+        if use_arrays(self.backend):
+            # all right-hand sides go through in a single matrix product
+            try:
+                constants = np.array(batch, dtype=np.float64)
+            except ValueError:
+                raise Exception(self.WRONG_NUMBER_OF_CONSTANTS_MSG)
+            if constants.ndim != 2 or constants.shape[1] != self.num_rows:
+                raise Exception(self.WRONG_NUMBER_OF_CONSTANTS_MSG)
+            reduced = self.transform.dot(constants.T)
+            inconsistent = np.any(np.abs(reduced[self.rank:]) >= self.backend.tolerance, axis=0)
+            reduced_columns = reduced.T.tolist()
+        else:
+            batch = [[self.backend.coerce(c) for c in constant_terms] for constant_terms in batch]
+            if any(len(constant_terms) != self.num_rows for constant_terms in batch):
+                raise Exception(self.WRONG_NUMBER_OF_CONSTANTS_MSG)
+            reduced_columns = [[sum([m * c for m, c in zip(row, constant_terms)]) for row in self.transform]
+                               for constant_terms in batch]
+            inconsistent = [not all(self.backend.is_near_zero(c) for c in column[self.rank:])
+                            for column in reduced_columns]
+
+        return [self._result(column, is_inconsistent)
+                for column, is_inconsistent in zip(reduced_columns, inconsistent)]
+
+    def _result(self, reduced_constants, is_inconsistent):
+        if is_inconsistent:
+            return INCONSISTENT
+        if self.rank < self.dimension:
+            return INFINITELY_MANY
+
+        solution = [None] * self.dimension
+        for constant, variable_position in zip(reduced_constants, self.pivots):
+            solution[variable_position] = constant
+        return solution
@@ -0,0 +1,183 @@
+from numeric import get_backend
+from vector import Vector
+import profiling
+
+# basepoint can legitimately be None (zero normal vector), so "not computed yet" needs its own marker
+NOT_COMPUTED = object()
+
+class Hyperplane(object):
+
+    NO_NONZERO_ELTS_FOUND_MSG = 'No nonzero elements found'
+    EITHER_DIM_OR_NORMAL_VEC_MUST_BE_PROVIDED_MSG = 'Either the dimension of the hyperplane or the normal vector must be provided'
+    DIM_AND_NORMAL_VEC_MUST_AGREE_MSG = 'The normal vector must have the dimension of the hyperplane'
+
+    def __init__(self, dimension=None, normal_vector=None, constant_term=None, backend=None):
+        if not dimension and not normal_vector:
+            raise Exception(self.EITHER_DIM_OR_NORMAL_VEC_MUST_BE_PROVIDED_MSG)
+        if dimension and normal_vector and dimension != normal_vector.dimension:
+            raise Exception(self.DIM_AND_NORMAL_VEC_MUST_AGREE_MSG)
+        self.dimension = dimension or normal_vector.dimension
+
+        if backend is None and normal_vector:
+            backend = normal_vector.backend
+        self.backend = get_backend(backend)
+
+        if not normal_vector:
+            all_zeros = ['0']*self.dimension
+            normal_vector = Vector(all_zeros, self.backend)
+        elif normal_vector.backend is not self.backend:
+            normal_vector = Vector(normal_vector.coordinates, self.backend)
+        self.normal_vector = normal_vector
+
+        if not constant_term:
+            constant_term = '0'
+        self.constant_term = self.backend.coerce(constant_term)
+
+        self._basepoint = NOT_COMPUTED
+        profile = profiling.current()
+        if profile is not None:
+            profile.count('hyperplanes')
+
+    @classmethod
+    def _from_internal(cls, normal_vector, constant_term):
+        """
+        fast constructor for values that are already in internal form:
+        normal_vector is a Vector and constant_term is a number of that
+        vector's backend. Nothing is validated or coerced.
+        """
+        hyperplane = cls.__new__(cls)
+        hyperplane.dimension = normal_vector.dimension
+        hyperplane.backend = normal_vector.backend
+        hyperplane.normal_vector = normal_vector
+        hyperplane.constant_term = constant_term
+        hyperplane._basepoint = NOT_COMPUTED
+        profile = profiling.current()
+        if profile is not None:
+            profile.count('hyperplanes')
+        return hyperplane
+
+    def __mul__(self, constant):
+      constant = self.backend.coerce(constant)
+      nvec = self.normal_vector * constant
+      const = self.constant_term * constant
+      return self._from_internal(nvec, const)
+
+    __rmul__ = __mul__
+
+    def with_backend(self, backend):
+        """
+        the same hyperplane, computed with another numeric backend
+        """
+        return self.__class__(normal_vector=self.normal_vector, constant_term=self.constant_term, backend=backend)
+
+
+    @property
+    def basepoint(self):
+        """
+        a point on the hyperplane, computed the first time it is asked for
+        """
+        if self._basepoint is NOT_COMPUTED:
+            self.set_basepoint()
+        return self._basepoint
+
+    def set_basepoint(self):
+        try:
+            n = self.normal_vector.coordinates
+            c = self.constant_term
+            basepoint_coords = ['0']*self.dimension
+
+            initial_index = self.first_nonzero_index(list(n), self.backend)
+            initial_coefficient = n[initial_index]
+
+            basepoint_coords[initial_index] = c/initial_coefficient
+            self._basepoint = Vector(basepoint_coords, self.backend)
+
+        except Exception as e:
+            if str(e) == Hyperplane.NO_NONZERO_ELTS_FOUND_MSG:
+                self._basepoint = None
+            else:
+                raise e
+
+
+    def __str__(self):
+
+        num_decimal_places = 3
+
+        def write_coefficient(coefficient, is_initial_term=False):
+            coefficient = round(coefficient, num_decimal_places)
+            if coefficient % 1 == 0:
+                coefficient = int(coefficient)
+
+            output = ''
+
+            if coefficient < 0:
+                output += '-'
+            if coefficient > 0 and not is_initial_term:
+                output += '+'
+
+            if not is_initial_term:
+                output += ' '
+
+            if abs(coefficient) != 1:
+                output += '{}'.format(abs(coefficient))
+
+            return output
+
+        n = self.normal_vector.coordinates
+
+        try:
+            initial_index = self.first_nonzero_index(list(n), self.backend)
+            terms = [write_coefficient(n[i], is_initial_term=(i==initial_index)) + 'x_{}'.format(i+1)
+                     for i in range(self.dimension) if round(n[i], num_decimal_places) != 0]
+            output = ' '.join(terms)
+
+        except Exception as e:
+            if str(e) == self.NO_NONZERO_ELTS_FOUND_MSG:
+                output = '0'
+            else:
+                raise e
+
+        constant = round(self.constant_term, num_decimal_places)
+        if constant % 1 == 0:
+            constant = int(constant)
+        output += ' = {}'.format(constant)
+
+        return output
+
+    def __eq__(self, hyperplane):
+      """
+      Two hyperplanes are the same if they are parallel AND
+      a vector connecting a point chosen on each hyperplane
+      is orthogonal to the normal vectors of each hyperplane.
+      """
+      if self.normal_vector.is_zero():
+        if not hyperplane.normal_vector.is_zero():
+          return False
+        else:
+          diff = self.constant_term - hyperplane.constant_term
+          return self.backend.is_near_zero(diff)
+      elif hyperplane.normal_vector.is_zero():
+        return False
+
+      if not self.is_parallel_to(hyperplane):
+        return False
+
+      connecting_vector = self.basepoint - hyperplane.basepoint # just subtract basepoints to find a connecting vector
+      return connecting_vector.is_orthogonal_to(self.normal_vector) # because we already know they are parallel, we don't have to compare to each normal vector, just one
+
+
+    @staticmethod
+    def first_nonzero_index(iterable, backend=None):
+        backend = get_backend(backend)
+        for k, item in enumerate(iterable):
+            if not backend.is_near_zero(item):
+                return k
+        raise Exception(Hyperplane.NO_NONZERO_ELTS_FOUND_MSG)
+
+    def is_parallel_to(self, p):
+        """
+        Two hyperplanes are parallel if their normal vectors are parallel
+        """
+        normal1 = self.normal_vector
+        normal2 = p.normal_vector
+        return normal1.is_parallel_to(normal2)
@@ -0,0 +1,169 @@
+"""
+A LinearSystem that keeps its reduced row echelon form up to date as
+equations are added, replaced or removed, instead of eliminating from
+scratch every time it is asked.
+"""
+
+from bisect import bisect_left
+
+from numeric import get_backend
+from hyperplane import Hyperplane
+from linsys import LinearSystem
+
+PIVOT = 'pivot'
+REDUNDANT = 'redundant'
+INCONSISTENT_ROW = 'inconsistent'
+
+
+class IncrementalLinearSystem(LinearSystem):
+    """
+    Alongside its equations, the system keeps the RREF rows of its augmented
+    matrix and their pivot columns. The constant column counts as a pivot
+    too: once some equation reduces to 0 = c with c nonzero, a 0 = 1 row is
+    kept and the system is inconsistent.
+
+    append costs one reduction against the existing pivot rows, O(n^2).
+    Removing or replacing an equation that reduced to 0 = 0 when it was added
+    (it lies in the span of the others) leaves the RREF untouched; removing
+    any other equation rebuilds it from the remaining ones.
+    rank, pivots and is_consistent are O(1).
+    """
+
+    EMPTY_SYSTEM_NEEDS_DIMENSION_MSG = 'An empty system needs its dimension'
+
+    def __init__(self, planes=(), dimension=None, backend=None):
+        planes = list(planes)
+        if planes:
+            super(IncrementalLinearSystem, self).__init__(planes, backend)
+        elif not dimension:
+            raise Exception(self.EMPTY_SYSTEM_NEEDS_DIMENSION_MSG)
+        else:
+            self.backend = get_backend(backend)
+            self.planes = []
+            self.dimension = dimension
+            self._factorization = None
+        self._rebuild()
+
+    @classmethod
+    def from_matrix(cls, rows, dimension, backend=None, row_class=Hyperplane):
+        # the equations are reduced one by one as planes, so build them up front
+        planes = LinearSystem.from_matrix(rows, dimension, backend, row_class).planes
+        return cls(planes, dimension, backend)
+
+    @property
+    def rank(self):
+        return len(self._pivots) - (0 if self._is_consistent else 1)
+
+    @property
+    def pivots(self):
+        return self._pivots[:self.rank]
+
+    def is_consistent(self):
+        return self._is_consistent
+
+    def append(self, plane):
+        if plane.dimension != self.dimension:
+            raise Exception(self.ALL_PLANES_MUST_BE_IN_SAME_DIM_MSG)
+        plane = self._coerce_row(plane)
+        self.planes.append(plane)
+        self._statuses.append(self._insert(plane))
+        self._factorization = None
+
+    def __delitem__(self, i):
+        status = self._statuses[i]
+        del self.planes[i]
+        del self._statuses[i]
+        if status != REDUNDANT:
+            self._rebuild()
+        self._factorization = None
+
+    def __setitem__(self, i, x):
+        if x.dimension != self.dimension:
+            raise Exception(self.ALL_PLANES_MUST_BE_IN_SAME_DIM_MSG)
+        x = self._coerce_row(x)
+        status = self._statuses[i]
+        self.planes[i] = x
+        if status == REDUNDANT:
+            self._statuses[i] = self._insert(x)
+        else:
+            self._rebuild()
+        self._factorization = None
+
+    def swap_rows(self, row1, row2):
+        super(IncrementalLinearSystem, self).swap_rows(row1, row2)
+        self._statuses[row1], self._statuses[row2] = self._statuses[row2], self._statuses[row1]
+
+    def multiply_coefficient_and_row(self, coefficient, row):
+        super(IncrementalLinearSystem, self).multiply_coefficient_and_row(coefficient, row)
+        if self.backend.is_near_zero(self.backend.coerce(coefficient)):
+            self._rebuild()
+
+    def add_multiple_times_row_to_row(self, coefficient, row_to_add, row_to_be_added_to):
+        super(IncrementalLinearSystem, self).add_multiple_times_row_to_row(coefficient, row_to_add, row_to_be_added_to)
+        # the span is unchanged, but which equations are redundant may not be
+        self._rebuild()
+
+    def copy(self):
+        system = super(IncrementalLinearSystem, self).copy()
+        system._rows = [list(row) for row in self._rows]
+        system._pivots = list(self._pivots)
+        system._statuses = list(self._statuses)
+        return system
+
+    def _result(self, rows, in_place):
+        result = super(IncrementalLinearSystem, self)._result(rows, in_place)
+        if in_place:
+            # the equations are now the RREF rows, which span the same space
+            # but reduce with different statuses
+            self._rebuild()
+        return result
+
+    def _rref_matrix(self, pivoting='partial', in_place=False):
+        rows = [list(row) for row in self._rows]
+        zero_row = [self.backend.zero] * (self.dimension + 1)
+        rows += [list(zero_row) for _ in range(len(self.planes) - len(rows))]
+        return rows, self.pivots
+
+    def _rebuild(self):
+        self._rows = []
+        self._pivots = []
+        self._is_consistent = True
+        self._statuses = [self._insert(p) for p in self.planes]
+
+    def _insert(self, plane):
+        """
+        reduces plane against the current RREF rows and, if anything is
+        left, adds it as a new pivot row. Returns the equation's status.
+        """
+        backend = self.backend
+        row = list(plane.normal_vector.coordinates) + [plane.constant_term]
+
+        for pivot_row, col in zip(self._rows, self._pivots):
+            value = row[col]
+            if value != 0:
+                for k in range(col, len(row)):
+                    row[k] -= value * pivot_row[k]
+
+        col = next((k for k, value in enumerate(row) if not backend.is_near_zero(value)), None)
+        if col is None:
+            return REDUNDANT
+
+        pivot_value = row[col]
+        row = [value / pivot_value for value in row]
+        row[col] = backend.one
+        for k in range(col):
+            row[k] = backend.zero
+
+        for other in self._rows:
+            value = other[col]
+            if value != 0:
+                for k in range(col, len(row)):
+                    other[k] -= value * row[k]
+
+        position = bisect_left(self._pivots, col)
+        self._rows.insert(position, row)
+        self._pivots.insert(position, col)
+        if col == self.dimension:
+            self._is_consistent = False
+            return INCONSISTENT_ROW
+        return PIVOT
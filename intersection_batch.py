@@ -0,0 +1,95 @@
+"""
+Closed-form intersections for many small systems at once.
+
+Line.intersection_with solves one pair of lines with Cramer's rule. The
+functions here do the same for N pairs of lines (or N triples of planes)
+as a handful of NumPy array operations, with the same tolerance: a
+determinant that rounds to 0 at 10 decimal places means no unique
+intersection.
+
+Each function returns (points, parallel, coincident):
+points      N x d array of intersections, NaN where there is no unique one
+parallel    N bools, True where there is no unique intersection
+coincident  N bools, True where there are infinitely many (a subset of parallel)
+"""
+
+import numpy as np
+
+from vector import TOLERANCE
+
+
+def intersect_lines(normals1, constants1, normals2, constants2):
+    """
+    intersections of N pairs of lines, line i being
+    normals1[i] . x = constants1[i] and normals2[i] . x = constants2[i]
+    """
+    n1 = np.asarray(normals1, dtype=np.float64).reshape(-1, 2)
+    n2 = np.asarray(normals2, dtype=np.float64).reshape(-1, 2)
+    k1 = np.asarray(constants1, dtype=np.float64).reshape(-1)
+    k2 = np.asarray(constants2, dtype=np.float64).reshape(-1)
+
+    A, B = n1[:, 0], n1[:, 1]
+    C, D = n2[:, 0], n2[:, 1]
+    denominator = np.round(A*D - B*C, 10) #round is per a 1e-10 tolerance
+    parallel = denominator == 0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        points = np.column_stack([D*k1 - B*k2, -C*k1 + A*k2]) / denominator[:, np.newaxis]
+    points[parallel] = np.nan
+
+    coincident = parallel & _same_hyperplane(n1, k1, n2, k2)
+    return points, parallel, coincident
+
+
+def intersect_planes(normals, constants):
+    """
+    intersections of N triples of planes: normals is N x 3 x 3 (three normal
+    vectors per triple) and constants is N x 3
+    """
+    n = np.asarray(normals, dtype=np.float64).reshape(-1, 3, 3)
+    k = np.asarray(constants, dtype=np.float64).reshape(-1, 3)
+    n1, n2, n3 = n[:, 0], n[:, 1], n[:, 2]
+
+    c23 = np.cross(n2, n3)
+    denominator = np.round(np.einsum('ij,ij->i', n1, c23), 10)
+    parallel = denominator == 0
+
+    numerator = (k[:, 0, np.newaxis] * c23 +
+                 k[:, 1, np.newaxis] * np.cross(n3, n1) +
+                 k[:, 2, np.newaxis] * np.cross(n1, n2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        points = numerator / denominator[:, np.newaxis]
+    points[parallel] = np.nan
+
+    # no unique point: infinitely many exactly when adding the constants
+    # does not raise the rank of the coefficients
+    coincident = np.zeros(len(n), dtype=bool)
+    if parallel.any():
+        augmented = np.concatenate([n[parallel], k[parallel][:, :, np.newaxis]], axis=2)
+        coincident[parallel] = (np.linalg.matrix_rank(n[parallel], tol=TOLERANCE) ==
+                                np.linalg.matrix_rank(augmented, tol=TOLERANCE))
+    return points, parallel, coincident
+
+
+def _same_hyperplane(n1, k1, n2, k2):
+    """
+    Hyperplane.__eq__ for parallel pairs: the basepoint of the second one
+    must satisfy the first one's equation (the connecting vector between
+    basepoints is orthogonal to the normal). Zero normals are only equal to
+    each other, and only if their constants match.
+    """
+    nonzero2 = np.abs(n2) >= TOLERANCE
+    has_basepoint = nonzero2.any(axis=1)
+    first = np.argmax(nonzero2, axis=1)
+    rows = np.arange(len(n2))
+
+    basepoint2 = np.zeros_like(n2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        basepoint2[rows, first] = np.where(has_basepoint, k2 / n2[rows, first], 0)
+
+    zero1 = np.sqrt(np.einsum('ij,ij->i', n1, n1)) < TOLERANCE
+    zero2 = ~has_basepoint | (np.sqrt(np.einsum('ij,ij->i', n2, n2)) < TOLERANCE)
+
+    on_first = np.abs(np.einsum('ij,ij->i', n1, basepoint2) - k1) < TOLERANCE
+    both_zero = zero1 & zero2 & (np.abs(k1 - k2) < TOLERANCE)
+    return np.where(zero1 | zero2, both_zero, on_first)
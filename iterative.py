@@ -0,0 +1,345 @@
+"""
+Iterative solvers for large square systems, sparse or dense.
+
+method          for
+'cg'            symmetric positive definite coefficients
+'gmres'         anything nonsingular (restarted every `restart` iterations)
+'jacobi'        strictly diagonally dominant coefficients
+'gauss-seidel'  diagonally dominant or symmetric positive definite ones
+
+cg and gmres can be preconditioned with 'jacobi' (the diagonal) or 'ilu0'
+(an incomplete LU factorization with the sparsity pattern of the
+coefficients). Each iteration costs one pass over the nonzero coefficients,
+which are read straight from the augmented matrix rows, so a system of
+SparseHyperplanes is never made dense. All arithmetic is in the system's
+own backend.
+
+An iteration stops once ||b - A x|| / ||b|| (2-norms) is at most tolerance.
+x0 (a Vector, a list of numbers or a UniqueSolution) is the starting point,
+zero by default. callback(iteration, relative_residual) is called after
+every iteration. The result is a UniqueSolution, with the residual it
+reached and the number of iterations it took.
+"""
+
+from vector import Vector
+from sparse import SparseRow
+from elimination import np, use_arrays
+from solution import UniqueSolution
+
+METHODS = ('cg', 'gmres', 'jacobi', 'gauss-seidel')
+PRECONDITIONERS = (None, 'jacobi', 'ilu0')
+DEFAULT_TOLERANCE = 1e-10
+DEFAULT_MAX_ITERATIONS = 1000
+DEFAULT_RESTART = 30
+
+UNKNOWN_METHOD_MSG = 'Unknown iterative method'
+UNKNOWN_PRECONDITIONER_MSG = 'Unknown preconditioner'
+PRECONDITIONER_NOT_SUPPORTED_MSG = 'Only cg and gmres take a preconditioner'
+NOT_SQUARE_MSG = 'Iterative solvers need as many equations as unknowns'
+ZERO_DIAGONAL_MSG = 'Coefficient matrix has a zero on its diagonal'
+DID_NOT_CONVERGE_MSG = 'Iterative solver did not converge'
+WRONG_STARTING_POINT_MSG = 'Starting point has the wrong dimension'
+
+
+def solve_iteratively(system, method='cg', preconditioner=None, tolerance=DEFAULT_TOLERANCE,
+                      max_iterations=DEFAULT_MAX_ITERATIONS, x0=None, callback=None, restart=DEFAULT_RESTART):
+    if method not in METHODS:
+        raise Exception('{}: {}'.format(UNKNOWN_METHOD_MSG, method))
+    if preconditioner not in PRECONDITIONERS:
+        raise Exception('{}: {}'.format(UNKNOWN_PRECONDITIONER_MSG, preconditioner))
+    if preconditioner is not None and method not in ('cg', 'gmres'):
+        raise Exception(PRECONDITIONER_NOT_SUPPORTED_MSG)
+
+    matrix = CompressedRows(system._matrix_rows(), system.dimension, system.backend)
+    if len(matrix.rows) != system.dimension:
+        raise Exception(NOT_SQUARE_MSG)
+
+    x = _starting_point(x0, system.dimension, system.backend)
+    apply_preconditioner = None
+    if preconditioner == 'jacobi':
+        apply_preconditioner = _jacobi_preconditioner(matrix)
+    elif preconditioner == 'ilu0':
+        apply_preconditioner = _ilu0_preconditioner(matrix)
+
+    monitor = _Monitor(matrix, tolerance, max_iterations, callback)
+    if method == 'cg':
+        x = _cg(matrix, x, apply_preconditioner, monitor)
+    elif method == 'gmres':
+        x = _gmres(matrix, x, apply_preconditioner, monitor, restart)
+    elif method == 'jacobi':
+        x = _jacobi(matrix, x, monitor)
+    else:
+        x = _gauss_seidel(matrix, x, monitor)
+
+    solution = UniqueSolution(system.dimension, list(range(system.dimension)), Vector(x, system.backend))
+    solution.residual = monitor.residual
+    solution.iterations = monitor.iterations
+    return solution
+
+
+class CompressedRows(object):
+    """
+    the coefficients as one (columns, values) pair of lists per row, zeros
+    left out, plus the constant terms
+    """
+
+    def __init__(self, rows, dimension, backend):
+        self.backend = backend
+        self.dimension = dimension
+        self.rows = []
+        self.constants = []
+        for row in rows:
+            if isinstance(row, SparseRow):
+                terms = sorted((k, v) for k, v in row.items() if k != -1 and v != 0)
+            else:
+                terms = [(k, v) for k, v in enumerate(row[:dimension]) if v != 0]
+            self.rows.append(([k for k, v in terms], [v for k, v in terms]))
+            self.constants.append(row[-1])
+
+        self._arrays = None
+        if use_arrays(backend):
+            # coordinate form, so a product is one gather and one bincount
+            self._arrays = (np.array([i for i, (columns, _) in enumerate(self.rows) for _ in columns], dtype=np.intp),
+                            np.array([k for columns, _ in self.rows for k in columns], dtype=np.intp),
+                            np.array([v for _, values in self.rows for v in values], dtype=np.float64))
+
+    def dot(self, x):
+        if self._arrays is not None:
+            row_ids, columns, values = self._arrays
+            return np.bincount(row_ids, weights=values * np.asarray(x)[columns], minlength=len(self.rows)).tolist()
+        zero = self.backend.zero
+        result = []
+        for columns, values in self.rows:
+            total = zero
+            for k, v in zip(columns, values):
+                total += v * x[k]
+            result.append(total)
+        return result
+
+    def diagonal(self):
+        diagonal = []
+        for i, (columns, values) in enumerate(self.rows):
+            value = dict(zip(columns, values)).get(i, 0)
+            if value == 0:
+                raise Exception(ZERO_DIAGONAL_MSG)
+            diagonal.append(value)
+        return diagonal
+
+    def residual(self, x):
+        return [b - ax for b, ax in zip(self.constants, self.dot(x))]
+
+
+class _Monitor(object):
+    """
+    counts iterations, reports them to the callback and decides when to stop
+    """
+
+    def __init__(self, matrix, tolerance, max_iterations, callback):
+        self.backend = matrix.backend
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.callback = callback
+        self.norm_b = _norm(matrix.constants, matrix.backend)
+        self.iterations = 0
+        self.residual = None
+
+    def relative(self, residual_norm):
+        if self.norm_b == 0:
+            return float(residual_norm)
+        return float(residual_norm / self.norm_b)
+
+    def converged(self, residual_norm):
+        self.residual = self.relative(residual_norm)
+        return self.residual <= self.tolerance
+
+    def step(self, residual_norm):
+        """
+        records one iteration. True once the residual is small enough;
+        raises if that took more than max_iterations
+        """
+        self.iterations += 1
+        done = self.converged(residual_norm)
+        if self.callback is not None:
+            self.callback(self.iterations, self.residual)
+        if not done and self.iterations >= self.max_iterations:
+            raise Exception('{} after {} iterations (relative residual {})'.format(
+                DID_NOT_CONVERGE_MSG, self.iterations, self.residual))
+        return done
+
+
+def _cg(matrix, x, apply_preconditioner, monitor):
+    backend = matrix.backend
+    r = matrix.residual(x)
+    if monitor.converged(_norm(r, backend)):
+        return x
+    z = apply_preconditioner(r) if apply_preconditioner else r
+    p = list(z)
+    rz = _dot(r, z)
+    while True:
+        ap = matrix.dot(p)
+        alpha = rz / _dot(p, ap)
+        x = [xi + alpha * pi for xi, pi in zip(x, p)]
+        r = [ri - alpha * api for ri, api in zip(r, ap)]
+        if monitor.step(_norm(r, backend)):
+            return x
+        z = apply_preconditioner(r) if apply_preconditioner else r
+        rz, previous = _dot(r, z), rz
+        beta = rz / previous
+        p = [zi + beta * pi for zi, pi in zip(z, p)]
+
+
+def _gmres(matrix, x, apply_preconditioner, monitor, restart):
+    """
+    restarted GMRES, preconditioned on the right so the residual it
+    monitors is the true one
+    """
+    backend = matrix.backend
+    zero = backend.zero
+    n = matrix.dimension
+    precondition = apply_preconditioner or (lambda v: v)
+    while True:
+        r = matrix.residual(x)
+        beta = _norm(r, backend)
+        if monitor.converged(beta):
+            return x
+
+        basis = [[v / beta for v in r]]
+        h = []                       # h[j] is column j of the Hessenberg matrix
+        cosines, sines = [], []
+        g = [beta]
+        for j in range(restart):
+            w = matrix.dot(precondition(basis[j]))
+            column = []
+            for v in basis:
+                coefficient = _dot(w, v)
+                column.append(coefficient)
+                w = [wi - coefficient * vi for wi, vi in zip(w, v)]
+            norm_w = _norm(w, backend)
+            column.append(norm_w)
+
+            # apply the earlier rotations, then zero the new subdiagonal entry
+            for i in range(j):
+                a, b = column[i], column[i + 1]
+                column[i] = cosines[i] * a + sines[i] * b
+                column[i + 1] = -sines[i] * a + cosines[i] * b
+            a, b = column[j], column[j + 1]
+            length = backend.sqrt(a * a + b * b)
+            cosine, sine = (a / length, b / length) if length != 0 else (backend.one, zero)
+            cosines.append(cosine)
+            sines.append(sine)
+            column[j] = length
+            column[j + 1] = zero
+            g.append(-sine * g[j])
+            g[j] = cosine * g[j]
+            h.append(column)
+
+            done = monitor.step(abs(g[j + 1]))
+            if done or norm_w == 0 or j == restart - 1:
+                break
+            basis.append([wi / norm_w for wi in w])
+
+        # back substitution for the least squares coefficients
+        k = len(h)
+        y = [zero] * k
+        for i in reversed(range(k)):
+            total = g[i] - sum([h[m][i] * y[m] for m in range(i + 1, k)], zero)
+            y[i] = total / h[i][i]
+        update = [zero] * n
+        for coefficient, v in zip(y, basis):
+            update = [ui + coefficient * vi for ui, vi in zip(update, v)]
+        x = [xi + ui for xi, ui in zip(x, precondition(update))]
+        if done:
+            return x
+
+
+def _jacobi(matrix, x, monitor):
+    backend = matrix.backend
+    diagonal = matrix.diagonal()
+    r = matrix.residual(x)
+    if monitor.converged(_norm(r, backend)):
+        return x
+    while True:
+        x = [xi + ri / d for xi, ri, d in zip(x, r, diagonal)]
+        r = matrix.residual(x)
+        if monitor.step(_norm(r, backend)):
+            return x
+
+
+def _gauss_seidel(matrix, x, monitor):
+    backend = matrix.backend
+    diagonal = matrix.diagonal()
+    x = list(x)
+    if monitor.converged(_norm(matrix.residual(x), backend)):
+        return x
+    while True:
+        for i, (columns, values) in enumerate(matrix.rows):
+            total = matrix.constants[i]
+            for k, v in zip(columns, values):
+                if k != i:
+                    total -= v * x[k]
+            x[i] = total / diagonal[i]
+        if monitor.step(_norm(matrix.residual(x), backend)):
+            return x
+
+
+def _jacobi_preconditioner(matrix):
+    inverse = [1 / d for d in matrix.diagonal()]
+    return lambda r: [ri * di for ri, di in zip(r, inverse)]
+
+
+def _ilu0_preconditioner(matrix):
+    """
+    L U ~ A keeping only the nonzero positions of A, then each application
+    solves L U z = r by forward and back substitution
+    """
+    matrix.diagonal()
+    n = matrix.dimension
+    factored = []
+    for i, (columns, values) in enumerate(matrix.rows):
+        row = dict(zip(columns, values))
+        for k in sorted(c for c in columns if c < i):
+            upper_k = factored[k]
+            row[k] = row[k] / upper_k[k]
+            for j, v in upper_k.items():
+                if j > k and j in row:
+                    row[j] -= row[k] * v
+        if row.get(i, 0) == 0:
+            raise Exception(ZERO_DIAGONAL_MSG)
+        factored.append(row)
+
+    lower = [[(k, v) for k, v in row.items() if k < i] for i, row in enumerate(factored)]
+    upper = [[(k, v) for k, v in row.items() if k > i] for i, row in enumerate(factored)]
+    diagonal = [row[i] for i, row in enumerate(factored)]
+
+    def apply(r):
+        y = list(r)
+        for i in range(n):
+            for k, v in lower[i]:
+                y[i] -= v * y[k]
+        for i in reversed(range(n)):
+            for k, v in upper[i]:
+                y[i] -= v * y[k]
+            y[i] = y[i] / diagonal[i]
+        return y
+
+    return apply
+
+
+def _starting_point(x0, dimension, backend):
+    if x0 is None:
+        return [backend.zero] * dimension
+    if isinstance(x0, UniqueSolution):
+        x0 = x0.vector
+    if isinstance(x0, Vector):
+        x0 = x0.coordinates
+    if len(x0) != dimension:
+        raise Exception(WRONG_STARTING_POINT_MSG)
+    return [backend.coerce(v) for v in x0]
+
+
+def _dot(a, b):
+    return sum([x * y for x, y in zip(a, b)])
+
+
+def _norm(v, backend):
+    return backend.sqrt(_dot(v, v)) if v else backend.zero
@@ -1,130 +1,15 @@
-from decimal import Decimal, getcontext
-
 from vector import Vector
+from hyperplane import Hyperplane
 
-getcontext().prec = 30
-
-class Line(object):
-
-    NO_NONZERO_ELTS_FOUND_MSG = 'No nonzero elements found'
-
-    def __init__(self, normal_vector=None, constant_term=None):
-        self.dimension = 2
-
-        if not normal_vector:
-            all_zeros = ['0']*self.dimension
-            normal_vector = Vector(all_zeros)
-        self.normal_vector = normal_vector
-
-        if not constant_term:
-            constant_term = Decimal('0')
-        self.constant_term = Decimal(constant_term)
-
-        self.set_basepoint()
-
-
-    def set_basepoint(self):
-        try:
-            n = self.normal_vector.coordinates
-            c = self.constant_term
-            basepoint_coords = ['0']*self.dimension
-
-            initial_index = Line.first_nonzero_index(list(n))
-            initial_coefficient = n[initial_index]
-
-            basepoint_coords[initial_index] = c/initial_coefficient
-            self.basepoint = Vector(basepoint_coords)
-
-        except Exception as e:
-            if str(e) == Line.NO_NONZERO_ELTS_FOUND_MSG:
-                self.basepoint = None
-            else:
-                raise e
-
-
-    def __str__(self):
-
-        num_decimal_places = 3
-
-        def write_coefficient(coefficient, is_initial_term=False):
-            coefficient = round(coefficient, num_decimal_places)
-            if coefficient % 1 == 0:
-                coefficient = int(coefficient)
-
-            output = ''
-
-            if coefficient < 0:
-                output += '-'
-            if coefficient > 0 and not is_initial_term:
-                output += '+'
 
-            if not is_initial_term:
-                output += ' '
+class Line(Hyperplane):
+    """
+    a hyperplane in 2 dimensions
+    """
 
-            if abs(coefficient) != 1:
-                output += '{}'.format(abs(coefficient))
-
-            return output
-
-        n = self.normal_vector.coordinates
-
-        try:
-            initial_index = Line.first_nonzero_index(list(n))
-            terms = [write_coefficient(n[i], is_initial_term=(i==initial_index)) + 'x_{}'.format(i+1)
-                     for i in range(self.dimension) if round(n[i], num_decimal_places) != 0]
-            output = ' '.join(terms)
-
-        except Exception as e:
-            if str(e) == self.NO_NONZERO_ELTS_FOUND_MSG:
-                output = '0'
-            else:
-                raise e
-
-        constant = round(self.constant_term, num_decimal_places)
-        if constant % 1 == 0:
-            constant = int(constant)
-        output += ' = {}'.format(constant)
-
-        return output
-
-    def __eq__(self, line):
-      """
-      Two lines are the same if they are parallel AND
-      a vector connecting a point chosen on each line
-      is orthogonal to the normal vectors of each line.
-      """
-
-      if self.normal_vector.is_zero():
-        if not line.normal_vector.is_zero():
-          return False
-        else:
-          diff = self.constant_term - ell.constant_term
-          return MyDecimal(diff).is_near_zero()
-      elif line.normal_vector.is_zero():
-        return False
-
-
-      if not self.is_parallel_to(line):
-        return False
-
-      connecting_vector = self.basepoint - line.basepoint # just subtract basepoints to find a connecting vector
-      return connecting_vector.is_orthogonal_to(self.normal_vector) # because we already know they are parallel, we don't have to compare to each normal vector, just one
-
-    @staticmethod
-    def first_nonzero_index(iterable):
-        for k, item in enumerate(iterable):
-            if not MyDecimal(item).is_near_zero():
-                return k
-        raise Exception(Line.NO_NONZERO_ELTS_FOUND_MSG)
-
-    def is_parallel_to(self, l):
-        """
-        Two lines are parallel if their normal vectors are parallel
-        This is a useful definition in higher dimensions
-        """
-        normal1 = self.normal_vector
-        normal2 = l.normal_vector
-        return normal1.is_parallel_to(normal2)
+    def __init__(self, normal_vector=None, constant_term=None, backend=None):
+        super(Line, self).__init__(dimension=2, normal_vector=normal_vector,
+                                   constant_term=constant_term, backend=backend)
 
     def intersection_with(self, line):
       """
@@ -141,9 +26,9 @@ class Line(object):
 
         x_numerator = D*k1 - B*k2
         y_numerator = -C*k1 + A*k2
-        one_over_denom = Decimal('1')/round((A*D - B*C), 10) #round is per a 1e-10 tolerance
+        one_over_denom = self.backend.one/round((A*D - B*C), 10) #round is per a 1e-10 tolerance
 
-        return Vector([x_numerator, y_numerator]) * one_over_denom
+        return Vector([x_numerator, y_numerator], self.backend) * one_over_denom
       except ZeroDivisionError:
         if self == line:
           # lines are the same, meaning there is infinity worth of intersection
@@ -151,7 +36,3 @@ class Line(object):
         else:
           # there is no intersection, lines must be parallel
           return None
-
-class MyDecimal(Decimal):
-    def is_near_zero(self, eps=1e-10):
-        return abs(self) < eps
\ No newline at end of file
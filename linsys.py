@@ -1,10 +1,23 @@
-from decimal import Decimal, getcontext
-from copy import deepcopy
+from copy import copy
 
+from numeric import get_backend
+from elimination import augmented_matrix, copy_rows, row_echelon_form, reduced_row_echelon_form
 from vector import Vector
-from plane import Plane
+from hyperplane import Hyperplane
+from sparse import SparseRow, SparseHyperplane
+from factorization import Factorization
+from solution import solution_from_rref, UniqueSolution, Parametrization, INCONSISTENT, INFINITELY_MANY
+from diagnostics import residual, condition_estimate
+from iterative import (solve_iteratively, DEFAULT_TOLERANCE as ITERATIVE_TOLERANCE,
+                       DEFAULT_MAX_ITERATIONS as ITERATIVE_MAX_ITERATIONS, DEFAULT_RESTART as ITERATIVE_RESTART)
+from refinement import solve_refined, DEFAULT_TOLERANCE as REFINEMENT_TOLERANCE, DEFAULT_MAX_ITERATIONS as REFINEMENT_MAX_ITERATIONS
+from solve_cache import get_solve_cache
+import profiling
+
+
+MAX_TRUSTED_CONDITION = 1e8
+MAX_TRUSTED_RESIDUAL = 1e-12
 
-getcontext().prec = 30
 
 class LinearSystem(object):
 
@@ -12,142 +25,321 @@ class LinearSystem(object):
     NO_SOLUTIONS_MSG = 'No solutions'
     INF_SOLUTIONS_MSG = 'Infinitely many solutions'
 
-    def __init__(self, planes):
+    # True once copy() has shared the rows of _matrix with another system
+    _shares_rows = False
+
+    def __init__(self, planes, backend=None):
         try:
             d = planes[0].dimension
             for p in planes:
                 assert p.dimension == d
 
-            self.planes = planes
+            self.backend = get_backend(backend if backend is not None else planes[0].backend)
+            self.planes = [self._coerce_row(p) for p in planes]
             self.dimension = d
+            self._factorization = None
 
         except AssertionError:
             raise Exception(self.ALL_PLANES_MUST_BE_IN_SAME_DIM_MSG)
 
+    @classmethod
+    def from_matrix(cls, rows, dimension, backend=None, row_class=Hyperplane):
+        """
+        a system made straight from its augmented matrix: rows of dimension
+        coefficients followed by the constant term (or SparseRows, for a
+        sparse system), already in the backend's number type. The rows are
+        used as they are, not copied.
+
+        Solving works on the matrix directly. The Plane objects (row_class
+        ones, or SparseHyperplanes) are only built if something asks for
+        system.planes, and from then on the system is kept as planes.
+        """
+        system = cls.__new__(cls)
+        system.backend = get_backend(backend)
+        system.dimension = dimension
+        system._matrix = rows
+        system._planes = None
+        system._row_class = row_class
+        system._factorization = None
+        return system
+
+    @property
+    def planes(self):
+        if self._planes is None:
+            with profiling.phase('build planes'):
+                self._planes = self._planes_from_matrix(self._matrix, self._row_class)
+            self._matrix = None
+        return self._planes
+
+    @planes.setter
+    def planes(self, planes):
+        self._planes = planes
+        self._matrix = None
+
+    def copy(self):
+        """
+        a system with the same equations that can be changed independently.
+        Only the list of rows is copied: the planes are shared, since row
+        operations replace them rather than change them, and the rows of a
+        system made with from_matrix are shared until an in-place
+        elimination would write to them.
+        """
+        system = copy(self)
+        if self._planes is None:
+            system._matrix = list(self._matrix)
+            self._shares_rows = system._shares_rows = True
+        else:
+            system._planes = list(self._planes)
+        return system
+
+
+    def _coerce_row(self, p):
+        """
+        rebuilds p on the system's backend if it was created on a different one
+        """
+        if p.backend is self.backend:
+            return p
+        return p.with_backend(self.backend)
 
     def swap_rows(self, row1, row2):
         """
         mutating operation
         """
         self.planes[row1], self.planes[row2] = self.planes[row2], self.planes[row1]
+        self._factorization = None
 
     def multiply_coefficient_and_row(self, coefficient, row):
         """
-        mutating operation. Implemented __mul__ and __rmul__ in Plane class
+        mutating operation. Implemented __mul__ and __rmul__ in Hyperplane class
         """
         self.planes[row] = coefficient * self.planes[row]
+        self._factorization = None
 
     def add_multiple_times_row_to_row(self, coefficient, row_to_add, row_to_be_added_to):
         multiplied_row = coefficient * self.planes[row_to_add]
         to_be_added_to = self.planes[row_to_be_added_to]
-        new_row = Plane(
+        new_row = to_be_added_to._from_internal(
           normal_vector=to_be_added_to.normal_vector + multiplied_row.normal_vector,
           constant_term=to_be_added_to.constant_term + multiplied_row.constant_term
           )
         self.planes[row_to_be_added_to] = new_row
+        self._factorization = None
 
-    def compute_triangular_form(self):
+    def compute_triangular_form(self, pivoting='none', in_place=False):
       """
       computes triangular form with the following rules:
       1) swaps occur from the first qualifying equation that is found
       2) no multiplication of equations is allowed
 
-      This works by first through each variable in the dimension space
+      This works by going through each variable in the dimension space
       e.g. if 3 dimensions, will look for x, y, and z in indices
-      and checking if it needs to be eliminated in the n+1 equations below its spot.
-      """
-      system = deepcopy(self)
-      indices = system.indices_of_first_nonzero_terms_in_each_row()
-
-      # range is [0, 1, 2...] this means triangular
-      for ind in range(len(indices[:self.dimension])):
-        ind_value = indices[ind]
-        # check to see if there is a value of ind in the ith place in spliced indices
-        if ind != ind_value and ind_value != -1:
-          try:
-            swap_from = indices.index(ind)
-            swap_to = ind
-            system.swap_rows(swap_from, swap_to)
-            # at this point we can guarantee that there is an eq with leading term ind_value
-            # in the ind position in the planes array in system.
-            # but we also need to re-calculate the indices, since swaps happened
-            indices = system.indices_of_first_nonzero_terms_in_each_row()
-          except ValueError:
-            # this happens when we can't find an index with the value ind as a leading term in any equation.
-            # if that is the case, we shouldn't try to do any more elimination,
-            # since that variable has already been sufficiently eliminated in our system.
-            # e.g x + y + z = 1 (no leading y)     or    y + z = 1   (since there is no leading x)
-            #             z = 2                          2y + 2z = 2
-            # We should just continue to check the next variable in the system.
-            continue
-
-        # perform elimination against each other equation, if necessary
-        for dex, dex_value in enumerate(indices[ind+1:]):
-          if dex_value == ind:
-            # we've found an equation where the leading term matches the one
-            # we are trying to eliminate. We should add N*the current equation
-            # to this one to eliminate the leading variable. where N is the LCM
-            parent_normal_component = system.planes[ind].normal_vector.coordinates[ind]
-            eq_to_eliminate_normal_component = system.planes[ind+dex+1].normal_vector.coordinates[ind]
-            multiple = Decimal(-(eq_to_eliminate_normal_component / parent_normal_component))
-
-            system.add_multiple_times_row_to_row(multiple, ind, ind+dex+1)
-
-        indices = system.indices_of_first_nonzero_terms_in_each_row()
-
-      return system
-
-    def compute_rref(self):
+      and eliminating it from every equation below the one that leads with it.
+
+      The elimination itself runs in place on the augmented matrix,
+      Plane objects are only built once at the end.
+
+      pivoting is one of elimination.PIVOTING_STRATEGIES, and rule 1) is
+      only what the default 'none' does. On the float backend a tiny leading
+      coefficient makes a poor pivot, so pass 'partial' (or another strategy)
+      to swap in a better one; with 'complete' the result is the RREF.
+
+      With in_place=True this system becomes its triangular form and is
+      returned, instead of a new system. A system made with from_matrix is
+      then eliminated without copying its rows at all, so the rows it was
+      given are overwritten.
+      """
+      rows, pivots = row_echelon_form(self._working_matrix(in_place), self.dimension, self.backend, pivoting)
+      return self._result(rows, in_place)
+
+    def compute_rref(self, pivoting='partial', in_place=False):
       """
       for each variable, subtract up!
+
+      pivoting is one of elimination.PIVOTING_STRATEGIES. The RREF is the
+      same whichever is used, only the rounding along the way differs.
+      in_place is as for compute_triangular_form.
       """
-      tf = self.compute_triangular_form()
-
-      indices = tf.indices_of_first_nonzero_terms_in_each_row()
-      enum_list = list(enumerate(indices))
-      enum_list.reverse()
-      for position_in_system, variable_position in enum_list:
-        # position_in_system = which equation is it, ind_val = which variable is it
-        if variable_position == -1:
-          # skip dis one... we don't need to do anything with this row
-          continue
-
-        bottom_eq_component = tf.planes[position_in_system].normal_vector.coordinates[variable_position]
-        #reduce to 1 if necessary
-        if bottom_eq_component != 1:
-          tf.planes[position_in_system] = tf.planes[position_in_system] * (1 / bottom_eq_component)
-          bottom_eq_component = 1
-
-        # examine all equations above the current equation, to see if it
-        # contains a variable at the ind_val index. if it does, eliminate it!
-        for j in indices[:position_in_system]:
-          eq_to_eliminate_in_component = tf.planes[j].normal_vector.coordinates[variable_position]
-          if eq_to_eliminate_in_component != 0:
-            multiple = -(eq_to_eliminate_in_component / bottom_eq_component)
-            tf.add_multiple_times_row_to_row(multiple, position_in_system, j)
-
-      return tf
-
-    def solve_system(self):
-      r = self.compute_rref()
-      indices = r.indices_of_first_nonzero_terms_in_each_row()
-      solution = [None] * r.dimension
-      for ind, val in enumerate(indices):
-        if val == -1: # this indicates there are no variables on left side of eq (no normal vector)
-          if r.planes[ind].constant_term != 0:
-            # this is a 0 = N case. Inconsistent
-            return "System is Inconsistent"
-        else:
-          solution[val] = r.planes[ind].constant_term
-      if any(item == None for item in solution):
+      rows, pivots = self._rref_matrix(pivoting, in_place)
+      return self._result(rows, in_place)
+
+    def solve_system(self, pivoting='partial'):
+      """
+      the solution as a list of coordinates, or one of the INCONSISTENT /
+      INFINITELY_MANY strings. compute_solution gives the same answer as an
+      object, including the parametrization of an infinite solution set.
+      """
+      solution = self.compute_solution(pivoting)
+      if not solution.is_consistent:
+        return INCONSISTENT
+      if not solution.is_unique:
         #this means that the solution is parametrized
-        return "Solution has infinitely many solutions"
+        return INFINITELY_MANY
+      return list(solution.vector.coordinates)
 
+    def compute_solution(self, pivoting='partial', check=False):
+      """
+      returns a UniqueSolution, a NoSolution, or a Parametrization
+      (basepoint plus one direction vector per free variable), all carrying
+      the rank and pivot columns of the RREF they were read from.
+
+      With check=True the solution also carries its residual and, for a
+      square dense system, a condition estimate (see diagnostics.py). That
+      costs one extra pass over the coefficients plus, for a square system
+      with a unique solution, an LU factorization of its coefficients, and
+      skips the solve cache.
+      """
+      if not check:
+        rows, pivots = self._rref_matrix(pivoting)
+        with profiling.phase('read solution'):
+          return solution_from_rref(rows, pivots, self.dimension, self.backend)
+
+      n = self.dimension
+      rows, pivots = reduced_row_echelon_form(self._augmented_matrix(), n, self.backend, pivoting)
+      solution = solution_from_rref(rows, pivots, n, self.backend)
+      original = self._matrix_rows()
+      if isinstance(solution, UniqueSolution):
+        solution.residual = residual(original, n, solution.vector.coordinates, self.backend)
+      elif isinstance(solution, Parametrization):
+        solution.residual = residual(original, n, solution.basepoint.coordinates, self.backend)
+      if len(original) == n and not (original and isinstance(original[0], SparseRow)):
+        if solution.rank < n:
+          solution.condition_estimate = float('inf')
+        else:
+          solution.condition_estimate = condition_estimate(original, n, self.backend)
       return solution
 
+    def solve_robustly(self, max_condition=MAX_TRUSTED_CONDITION, max_residual=MAX_TRUSTED_RESIDUAL,
+                       fallback='decimal', pivoting='partial'):
+      """
+      solves on the float backend with check=True, and only solves again on
+      the fallback backend if that answer cannot be trusted: its condition
+      estimate is above max_condition, its residual above max_residual, or
+      there was no solution to check. Returns whichever Solution it kept.
 
+      The Decimal backend still treats anything under its 1e-10 tolerance
+      as zero, so for systems worse than about 1e12 pass fallback='fraction'.
+      """
+      solution = self.with_backend('float').compute_solution(pivoting, check=True)
+      if (solution.residual is not None and solution.residual <= max_residual and
+          (solution.condition_estimate is None or solution.condition_estimate <= max_condition)):
+        return solution
+      return self.with_backend(fallback).compute_solution(pivoting, check=True)
 
+    def solve_refined(self, tolerance=REFINEMENT_TOLERANCE, max_iterations=REFINEMENT_MAX_ITERATIONS):
+      """
+      a UniqueSolution with a relative residual of at most tolerance, by
+      factoring in float64 and correcting the answer in this system's own
+      backend (see refinement.py). Falls back to compute_solution(check=True)
+      when there is no unique solution or float64 cannot get there.
+      """
+      return solve_refined(self, tolerance, max_iterations)
 
+    def solve_iteratively(self, method='cg', preconditioner=None, tolerance=ITERATIVE_TOLERANCE,
+                          max_iterations=ITERATIVE_MAX_ITERATIONS, x0=None, callback=None, restart=ITERATIVE_RESTART):
+      """
+      a UniqueSolution found by an iterative method instead of elimination:
+      'cg', 'gmres', 'jacobi' or 'gauss-seidel', cg and gmres optionally
+      preconditioned with 'jacobi' or 'ilu0'. See iterative.py for when each
+      one converges. Works on sparse systems without making them dense.
+      """
+      return solve_iteratively(self, method, preconditioner, tolerance, max_iterations, x0, callback, restart)
+
+    def with_backend(self, backend):
+      """
+      this system with every number converted to backend, built straight
+      from the augmented matrix
+      """
+      backend = get_backend(backend)
+      if backend is self.backend:
+        return self
+      coerce = backend.coerce
+      rows = []
+      for row in self._matrix_rows():
+        if isinstance(row, SparseRow):
+          rows.append(SparseRow(backend.zero, ((k, coerce(v)) for k, v in row.items())))
+        else:
+          rows.append([coerce(v) for v in row])
+      return LinearSystem.from_matrix(rows, self.dimension, backend, self._plane_class())
+
+    def factor(self):
+      """
+      factors the coefficients once, so the system can be solved for many
+      different constant terms without eliminating again. The factorization
+      is cached until the system is changed through one of its row operations
+      or __setitem__.
+
+      s.factor().solve_many([[1, 2, 3], [4, 5, 6]]) gives the same results as
+      solve_system would for each set of constant terms.
+      """
+      if self._factorization is None:
+        self._factorization = Factorization(self)
+      return self._factorization
+
+    def _rref_matrix(self, pivoting='partial', in_place=False):
+      """
+      the reduced row echelon form as an augmented matrix, plus its pivot columns.
+      The RREF is unique, so partial pivoting is free to pick whichever row
+      is numerically best without changing the answer.
+
+      If a solve cache is set (see solve_cache.set_solve_cache), systems with
+      the same equations up to order and scaling share one elimination.
+      """
+      cache = get_solve_cache()
+      if cache is not None:
+        return cache.rref_matrix(self, lambda: self._eliminate(pivoting, in_place))
+      return self._eliminate(pivoting, in_place)
+
+    def _eliminate(self, pivoting='partial', in_place=False):
+      return reduced_row_echelon_form(self._working_matrix(in_place), self.dimension, self.backend, pivoting)
+
+    def _working_matrix(self, in_place):
+      """
+      the augmented matrix for an elimination to overwrite: this system's
+      own rows when in_place allows it and nobody else holds them, else a copy
+      """
+      if in_place and self._planes is None and not self._shares_rows:
+        return self._matrix
+      return self._augmented_matrix()
+
+    def _result(self, rows, in_place):
+      if not in_place:
+        return self._from_augmented_matrix(rows)
+      self._row_class = self._plane_class()
+      self._planes = None
+      self._matrix = rows
+      self._shares_rows = False
+      self._factorization = None
+      return self
+
+    def _augmented_matrix(self):
+      """
+      a fresh augmented matrix for the elimination to work on in place
+      """
+      with profiling.phase('copy'):
+        if self._planes is None:
+          return copy_rows(self._matrix)
+        return augmented_matrix(self.planes)
+
+    def _matrix_rows(self):
+      """
+      the augmented matrix, read only. Does not build planes.
+      """
+      if self._planes is None:
+        return self._matrix
+      return augmented_matrix(self.planes)
+
+    def _from_augmented_matrix(self, rows):
+      return LinearSystem.from_matrix(rows, self.dimension, self.backend, self._plane_class())
+
+    def _plane_class(self):
+      if self._planes is None:
+        return self._row_class
+      return self.planes[0].__class__
+
+    def _planes_from_matrix(self, rows, row_class):
+      if rows and isinstance(rows[0], SparseRow):
+        return [SparseHyperplane.from_row(row, self.dimension, self.backend) for row in rows]
+      return [row_class._from_internal(Vector(row[:-1], self.backend), row[-1]) for row in rows]
 
     def indices_of_first_nonzero_terms_in_each_row(self):
         num_equations = len(self)
@@ -155,19 +347,22 @@ class LinearSystem(object):
 
         indices = [-1] * num_equations
 
-        for i,p in enumerate(self.planes):
-            try:
-                indices[i] = p.first_nonzero_index(p.normal_vector.coordinates)
-            except Exception as e:
-                if str(e) == Plane.NO_NONZERO_ELTS_FOUND_MSG:
-                    continue
-                else:
-                    raise e
+        with profiling.phase('first nonzero scan'):
+            for i,p in enumerate(self.planes):
+                try:
+                    indices[i] = p.first_nonzero_index(p.normal_vector.coordinates, p.backend)
+                except Exception as e:
+                    if str(e) == Hyperplane.NO_NONZERO_ELTS_FOUND_MSG:
+                        continue
+                    else:
+                        raise e
 
         return indices
 
 
     def __len__(self):
+        if self._planes is None:
+            return len(self._matrix)
         return len(self.planes)
 
 
@@ -178,7 +373,8 @@ class LinearSystem(object):
     def __setitem__(self, i, x):
         try:
             assert x.dimension == self.dimension
-            self.planes[i] = x
+            self.planes[i] = self._coerce_row(x)
+            self._factorization = None
 
         except AssertionError:
             raise Exception(self.ALL_PLANES_MUST_BE_IN_SAME_DIM_MSG)
@@ -189,8 +385,3 @@ class LinearSystem(object):
         temp = ['Equation {}: {}'.format(i+1,p) for i,p in enumerate(self.planes)]
         ret += '\n'.join(temp)
         return ret
-
-
-class MyDecimal(Decimal):
-    def is_near_zero(self, eps=1e-10):
-        return abs(self) < eps
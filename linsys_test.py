@@ -2,7 +2,27 @@ from plane import Plane
 from vector import Vector
 from linsys import LinearSystem
 from line import Line
+from hyperplane import Hyperplane, NOT_COMPUTED
+from sparse import SparseHyperplane
+from solution import UniqueSolution, NoSolution, Parametrization
+from parallel import solve_systems
+from incremental import IncrementalLinearSystem
+from solve_cache import SolveCache, set_solve_cache
+from loaders import load_csv, load_text, load_binary, load_matrix_market, write_binary, iter_csv
+from disk import DiskLinearSystem
+from spatial_index import HyperplaneIndex, deduplicate
+from profiling import Profile
+from diagnostics import residual
+from solve_service import SolveService, solve_async
+import asyncio
+import os
+import pickle
+import shutil
+import tempfile
+import threading
 from decimal import Decimal, getcontext
+from fractions import Fraction
+from numeric import set_default_backend
 
 getcontext().prec = 30
 
@@ -63,6 +83,36 @@ if not (s[0] == Plane(normal_vector=Vector(['-10','-10','-10']), constant_term='
         s[3] == p3):
     print ('test case 9 failed')
 
+### Vectors
+
+v = Vector(['3','4'])
+for change in (lambda: setattr(v, 'coordinates', (1, 2)), lambda: setattr(v, 'extra', 1),
+               lambda: delattr(v, 'dimension')):
+    try:
+        change()
+        print ('vector test case 1 failed')
+    except AttributeError as e:
+        if str(e) != Vector.IMMUTABLE_MSG:
+            print ('vector test case 1 failed')
+
+# the cached magnitude and unit vector belong to one Vector, never to the
+# ones arithmetic makes out of it
+if not (v.magnitude() == 5 and (v * 2).magnitude() == 10 and (v + v).magnitude() == 10 and
+        (v - v).is_zero() and v.normalize() is v.normalize() and
+        (v * -1).normalize() == Vector(['-0.6','-0.8']) and v.magnitude() == 5):
+    print ('vector test case 2 failed')
+
+w = Vector(['3.0','4.00'])
+if not (v == w and hash(v) == hash(w) and len({v, w, Vector(['4','3'])}) == 2):
+    print ('vector test case 3 failed')
+
+for u in (Vector(['1','2','2']), Vector([1.5, 2.5], 'float'), Vector([Fraction(1, 3), 1], 'fraction')):
+    u.magnitude()
+    copy = pickle.loads(pickle.dumps(u))
+    if not (copy == u and copy.backend is u.backend and copy.dimension == u.dimension and
+            copy.magnitude() == u.magnitude() and hash(copy) == hash(u)):
+        print ('vector test case 4 failed')
+
 ### Triangular form
 
 p1 = Plane(normal_vector=Vector(['1','1','1']), constant_term='1')
@@ -122,7 +172,483 @@ if not (r[0] == Plane(normal_vector=Vector(['1','0','0']), constant_term=Decimal
         r[2] == Plane(normal_vector=Vector(['0','0','1']), constant_term=Decimal('2')/Decimal('9'))):
     print ('rref test case 4 failed')
 
+p1 = Plane(normal_vector=Vector(['0','-5','0']), constant_term='0')
+p2 = Plane(normal_vector=Vector(['0','-5','0']), constant_term='1')
+s = LinearSystem([p1, p2])
+if not s.solve_system() == "System is Inconsistent":
+    print ('solve test case 1 failed')
+
+p1 = Plane(normal_vector=Vector(['0','3','0']), constant_term='3')
+p2 = Plane(normal_vector=Vector(['0','-1','7']), constant_term='1')
+p3 = Plane(normal_vector=Vector(['2','7','3']), constant_term='3')
+s = LinearSystem([p1, p2, p3])
+t = s.compute_triangular_form()
+if not (t[0] == p3 and
+        t[1] == p2 and
+        t[2] == Plane(normal_vector=Vector(['0','0','7']), constant_term='2')):
+    print ('triangular test case 5 failed')
+
+# a tiny leading coefficient is the first qualifying pivot, but a poor one
+tiny = LinearSystem.from_matrix([[1e-9, 1.0, 1.0], [1.0, 1.0, 2.0]], 2, 'float')
+t = tiny.compute_triangular_form('partial')
+if not (tiny.compute_triangular_form()[0].normal_vector.coordinates[0] == 1e-9 and
+        t[0].normal_vector.coordinates == (1.0, 1.0) and t[0].constant_term == 2.0 and
+        t[1].normal_vector.coordinates[0] == 0 and abs(t[1].constant_term - (1 - 2e-9)) < 1e-16):
+    print ('triangular test case 6 failed')
+if not all(abs(x - y) < 1e-20 for x, y in zip(s.solve_system(), [Decimal('-17')/Decimal('7'), Decimal('1'), Decimal('2')/Decimal('7')])):
+    print ('solve test case 2 failed')
+
 p1 = Plane(normal_vector=Vector(['5.826', '1.178', '-10.366']), constant_term='-8.15')
 p2 = Plane(normal_vector=Vector(['-2.931', '-0.589', '5.183']), constant_term='-4.075')
 s = LinearSystem([p1, p2])
-print(s.solve_system())
\ No newline at end of file
+print(s.solve_system())
+### Numeric backends
+
+p1 = Plane(normal_vector=Vector(['0','1','1']), constant_term='1')
+p2 = Plane(normal_vector=Vector(['1','-1','1']), constant_term='2')
+p3 = Plane(normal_vector=Vector(['1','2','-5']), constant_term='3')
+for backend in ('decimal', 'float', 'fraction'):
+    s = LinearSystem([p1,p2,p3], backend=backend)
+    solution = s.solve_system()
+    if not (s.backend.name == backend and
+            all(abs(float(x) - float(y)) < 1e-9 for x, y in zip(solution, [23/9., 7/9., 2/9.]))):
+        print ('backend test case 1 failed for {}'.format(backend))
+
+s = LinearSystem([p1,p2,p3], backend='fraction')
+if not s.solve_system() == [Fraction(23, 9), Fraction(7, 9), Fraction(2, 9)]:
+    print ('backend test case 2 failed')
+
+previous = set_default_backend('float')
+if not isinstance(Vector(['1', '2']).coordinates[0], float):
+    print ('backend test case 3 failed')
+set_default_backend(previous)
+
+# big enough for the float elimination to go more than one panel at a time
+n = 100
+rows = [[((i * 7 + j * 13) % 11) - 5 + (30 if i == j else 0) for j in range(n)] + [i] for i in range(n)]
+float_solution = LinearSystem.from_matrix([[float(x) for x in row] for row in rows], n, 'float').solve_system()
+decimal_solution = LinearSystem.from_matrix([[Decimal(x) for x in row] for row in rows], n).solve_system()
+if not all(abs(x - float(y)) < 1e-9 for x, y in zip(float_solution, decimal_solution)):
+    print ('backend test case 4 failed')
+
+# a row scaled up by 1e12 should not win the pivot just for being big
+for pivoting in ('none', 'partial', 'scaled-partial', 'complete'):
+    s = LinearSystem.from_matrix([[1e3, 1e12, 1e12], [1.0, 1.0, 2.0]], 2, 'float')
+    solution = s.solve_system(pivoting)
+    if not isinstance(solution, list) or abs(solution[1] - 0.999999999) > 1e-12:
+        print ('pivoting test case 1 failed for {}'.format(pivoting))
+    elif pivoting in ('scaled-partial', 'complete') and abs(solution[0] - 1.000000001) > 1e-12:
+        print ('pivoting test case 1 failed for {}'.format(pivoting))
+
+s = LinearSystem([p1,p2,p3], backend='float')
+solution = s.compute_solution(check=True)
+if not (solution.residual < 1e-15 and 1 < solution.condition_estimate < 100):
+    print ('diagnostics test case 1 failed')
+
+# the 1-norm condition number of the 6 x 6 Hilbert matrix is 2.907e7
+n = 6
+hilbert = LinearSystem.from_matrix([[1.0 / (i + j + 1) for j in range(n)] + [1.0] for i in range(n)], n, 'float')
+if not 2.907e7 / 3 <= hilbert.compute_solution(check=True).condition_estimate <= 2.908e7:
+    print ('diagnostics test case 2 failed')
+
+n = 8
+hilbert = LinearSystem.from_matrix([[Fraction(1, i + j + 1) for j in range(n)] + [Fraction(1)] for i in range(n)], n, 'fraction')
+solution = hilbert.solve_robustly()
+if not (solution.vector.backend.name == 'decimal' and solution.condition_estimate > 1e8 and
+        abs(solution.vector.coordinates[0] + 8) < 1e-18):
+    print ('diagnostics test case 3 failed')
+
+s = LinearSystem([p1,p2,p3])
+solution = s.solve_refined()
+if not (solution.residual <= 1e-25 and
+        all(abs(x - y) < 1e-25 for x, y in zip(solution.vector.coordinates, s.solve_system()))):
+    print ('refinement test case 1 failed')
+
+# refinement reports the same scaled residual as compute_solution(check=True)
+if solution.residual != residual(s._matrix_rows(), 3, solution.vector.coordinates, s.backend):
+    print ('refinement test case 2 failed')
+
+### Hyperplanes
+
+p1 = Hyperplane(normal_vector=Vector(['1','1','1','1']), constant_term='10')
+p2 = Hyperplane(normal_vector=Vector(['0','1','0','2']), constant_term='10')
+p3 = Hyperplane(normal_vector=Vector(['0','0','3','0']), constant_term='9')
+p4 = Hyperplane(normal_vector=Vector(['1','0','0','1']), constant_term='5')
+s = LinearSystem([p1,p2,p3,p4])
+if not all(abs(x - y) < 1e-20 for x, y in zip(s.solve_system(), [1, 2, 3, 4])):
+    print ('hyperplane test case 1 failed')
+
+r = s.compute_rref()
+if not (isinstance(r[0], Hyperplane) and r[3] == Hyperplane(normal_vector=Vector(['0','0','0','1']), constant_term='4')):
+    print ('hyperplane test case 2 failed')
+
+if not (Hyperplane(dimension=4) == Hyperplane(normal_vector=Vector(['0','0','0','0'])) and
+        p1 * 2 == p1 and not p1.is_parallel_to(p2)):
+    print ('hyperplane test case 3 failed')
+
+s = LinearSystem([p1,p2,p3,p4], backend='float')
+if not all(abs(x - y) < 1e-12 for x, y in zip(s.solve_system(), [1, 2, 3, 4])):
+    print ('hyperplane test case 4 failed')
+
+try:
+    Plane(normal_vector=Vector(['1','1']))
+    print ('hyperplane test case 5 failed')
+except Exception as e:
+    if str(e) != Hyperplane.DIM_AND_NORMAL_VEC_MUST_AGREE_MSG:
+        print ('hyperplane test case 5 failed')
+
+# basepoints are only worked out when asked for
+h = Hyperplane(normal_vector=Vector(['0','2','4']), constant_term='8')
+if not (h._basepoint is NOT_COMPUTED and h.basepoint == Vector(['0','4','0']) and
+        h._basepoint is h.basepoint):
+    print ('hyperplane test case 6 failed')
+
+zero = Hyperplane(normal_vector=Vector(['0','0','0']), constant_term='1')
+if not (zero.basepoint is None and zero._basepoint is None):
+    print ('hyperplane test case 7 failed')
+
+# is_parallel_to never needs a basepoint, == works them out as it goes
+a = Plane(normal_vector=Vector(['1','2','3']), constant_term='6')
+b = Plane(normal_vector=Vector(['-2','-4','-6']), constant_term='-12')
+c = Plane(normal_vector=Vector(['1','2','3']), constant_term='7')
+if not (a.is_parallel_to(c) and b.is_parallel_to(c) and not a.is_parallel_to(Plane(normal_vector=Vector(['0','1','0']))) and
+        a._basepoint is NOT_COMPUTED and c._basepoint is NOT_COMPUTED):
+    print ('hyperplane test case 8 failed')
+if not (a == b and a != c):
+    print ('hyperplane test case 9 failed')
+
+# _from_internal keeps the Vector and number it is given as they are
+normal = Vector(['1','0','0'])
+fast = Plane._from_internal(normal, Decimal('5'))
+if not (type(fast) is Plane and fast.normal_vector is normal and fast.constant_term == 5 and
+        fast.backend is normal.backend and fast.dimension == 3 and fast._basepoint is NOT_COMPUTED and
+        fast == Plane(normal_vector=Vector(['1','0','0']), constant_term='5') and
+        fast.basepoint == Vector(['5','0','0'])):
+    print ('hyperplane test case 10 failed')
+if not (a * 2)._basepoint is NOT_COMPUTED:
+    print ('hyperplane test case 11 failed')
+
+### Sparse systems
+
+p1 = SparseHyperplane(4, {0: '1', 1: '1', 2: '1', 3: '1'}, '10')
+p2 = SparseHyperplane(4, {1: '1', 3: '2'}, '10')
+p3 = SparseHyperplane(4, {2: '3'}, '9')
+p4 = SparseHyperplane(4, {0: '1', 3: '1'}, '5')
+s = LinearSystem([p1,p2,p3,p4])
+if not all(abs(x - y) < 1e-20 for x, y in zip(s.solve_system(), [1, 2, 3, 4])):
+    print ('sparse test case 1 failed')
+
+r = s.compute_rref()
+if not (isinstance(r[0], SparseHyperplane) and r[0].coefficients == {0: 1} and
+        r[3] == Hyperplane(normal_vector=Vector(['0','0','0','1']), constant_term='4')):
+    print ('sparse test case 2 failed')
+
+t = s.compute_triangular_form()
+if not t.indices_of_first_nonzero_terms_in_each_row() == [0, 1, 2, 3]:
+    print ('sparse test case 3 failed')
+
+s = LinearSystem([SparseHyperplane(3, {0: '1', 1: '1'}, '1'), SparseHyperplane(3, {0: '2', 1: '2'}, '3')])
+if not s.solve_system() == "System is Inconsistent":
+    print ('sparse test case 4 failed')
+
+s = LinearSystem([SparseHyperplane(3, {0: '1', 1: '3'}, '2'), SparseHyperplane(3, {0: '1', 1: '1', 2: '-2'}, '0')])
+r = s.compute_rref()
+if not (s.solve_system() == "Solution has infinitely many solutions" and
+        r.indices_of_first_nonzero_terms_in_each_row() == [0, 1]):
+    print ('sparse test case 5 failed')
+
+### Factor once, solve many
+
+p1 = Plane(normal_vector=Vector(['0','1','1']), constant_term='1')
+p2 = Plane(normal_vector=Vector(['1','-1','1']), constant_term='2')
+p3 = Plane(normal_vector=Vector(['1','2','-5']), constant_term='3')
+s = LinearSystem([p1,p2,p3])
+f = s.factor()
+results = f.solve_many([['1', '2', '3'], ['0', '0', '9']])
+if not (all(abs(x - y) < 1e-20 for x, y in zip(results[0], s.solve_system())) and
+        all(abs(x - y) < 1e-20 for x, y in zip(results[1], [2, 1, -1]))):
+    print ('factorization test case 1 failed')
+
+if not s.factor() is f:
+    print ('factorization test case 2 failed')
+s.swap_rows(0, 1)
+if s.factor() is f:
+    print ('factorization test case 3 failed')
+
+p1 = Plane(normal_vector=Vector(['1','1','1']), constant_term='1')
+p2 = Plane(normal_vector=Vector(['2','2','2']), constant_term='2')
+for backend in ('decimal', 'float', 'fraction'):
+    f = LinearSystem([p1,p2], backend=backend).factor()
+    if not f.solve_many([[1, 2], [1, 3]]) == ["Solution has infinitely many solutions", "System is Inconsistent"]:
+        print ('factorization test case 4 failed for {}'.format(backend))
+
+### Iterative solvers
+
+n = 30
+rows = [SparseHyperplane(n, dict([(i, '4')] + [(j, '-1') for j in (i - 1, i + 1) if 0 <= j < n]), str(i % 3)) for i in range(n)]
+s = LinearSystem(rows, backend='float')
+expected = s.solve_system()
+residuals = []
+for method, preconditioner in (('cg', 'ilu0'), ('gmres', 'jacobi'), ('jacobi', None), ('gauss-seidel', None)):
+    solution = s.solve_iteratively(method, preconditioner, callback=lambda i, r: residuals.append(r))
+    if not (solution.residual <= 1e-10 and
+            all(abs(x - y) < 1e-9 for x, y in zip(solution.vector.coordinates, expected))):
+        print ('iterative test case 1 failed for {}'.format(method))
+if not residuals or residuals[-1] > 1e-10:
+    print ('iterative test case 2 failed')
+
+rough = s.solve_iteratively('cg', tolerance=1e-4)
+if not s.solve_iteratively('cg', x0=rough).iterations < s.solve_iteratively('cg').iterations:
+    print ('iterative test case 3 failed')
+
+### Spatial index
+
+planes = [Plane(Vector(['1','2','3']), '1'), Plane(Vector(['0','0','1']), '2'),
+          Plane(Vector(['-2','-4','-6']), '-2'), Plane(Vector(['1','2','3']), '5'),
+          Plane(Vector(['0','0','0.5']), '1'), Plane(Vector(['0','1','0']), '2')]
+if deduplicate(planes) != [planes[0], planes[1], planes[3], planes[5]]:
+    print ('spatial index test case 1 failed')
+index = HyperplaneIndex(planes)
+if index.parallel_to(planes[0]) != [planes[0], planes[2], planes[3]] or index.equal_to(planes[4]) != [planes[1], planes[4]]:
+    print ('spatial index test case 2 failed')
+
+# mostly-zero normals in 20 dimensions: zero coordinates must not each
+# double the number of direction cells a lookup tries
+n = 20
+hyperplanes = []
+for i in range(50):
+    coordinates = ['0'] * n
+    coordinates[i % n] = '1'
+    coordinates[(i * 7 + 3) % n] = str(i % 5 + 1)
+    hyperplanes.append(Hyperplane(normal_vector=Vector(coordinates, 'float'), constant_term=str(i % 3)))
+if deduplicate(hyperplanes + hyperplanes[:10]) != hyperplanes:
+    print ('spatial index test case 3 failed')
+
+# every coordinate but the first on a cell edge, and a parallel normal
+# just across all of those edges
+h = Hyperplane(normal_vector=Vector(['1'] + ['0.0005'] * n, 'float'), constant_term='1')
+g = Hyperplane(normal_vector=Vector(['1'] + ['0.000500002'] * n, 'float'), constant_term='1')
+if HyperplaneIndex([g, hyperplanes[0]]).parallel_to(h) != [g]:
+    print ('spatial index test case 4 failed')
+
+### Profiling
+
+s = LinearSystem([p0, p1, p2, p3])
+with Profile() as profile:
+    s.solve_system()
+if not (profile.counts['row swaps'] > 0 and profile.counts['row operations'] > 0 and
+        profile.counts['decimal operations'] > 0 and profile.timings['triangularization'] > 0):
+    print ('profiling test case 1 failed')
+counts = dict(profile.counts)
+s.solve_system()
+if dict(profile.counts) != counts:
+    print ('profiling test case 2 failed')
+
+# work another thread does while a Profile is active is not recorded in it
+with Profile() as profile:
+    worker = threading.Thread(target=LinearSystem([p0, p1, p2, p3]).solve_system)
+    worker.start()
+    worker.join()
+if profile.counts:
+    print ('profiling test case 3 failed')
+
+### Async solving
+
+systems = [LinearSystem([Hyperplane(normal_vector=Vector([i + 1, 2, 0], 'float'), constant_term=i),
+                         Hyperplane(normal_vector=Vector([1, -1, 3], 'float'), constant_term=1),
+                         Hyperplane(normal_vector=Vector([0, 1, i % 2], 'float'), constant_term=2)])
+           for i in range(10)] + [LinearSystem([p0, p1, p2, p3])]
+
+async def solve_all():
+    async with SolveService(max_batch_size=4) as service:
+        return await asyncio.gather(*[service.solve(s) for s in systems])
+
+for result, s in zip(asyncio.run(solve_all()), systems):
+    expected = s.solve_system()
+    if isinstance(expected, str) and result != expected:
+        print ('async test case 1 failed')
+    elif not isinstance(expected, str) and max(abs(float(a) - float(b)) for a, b in zip(result, expected)) > 1e-10:
+        print ('async test case 1 failed')
+if asyncio.run(solve_async(systems[-1])) != systems[-1].solve_system():
+    print ('async test case 2 failed')
+
+getcontext().prec = 60
+s = LinearSystem([Hyperplane(normal_vector=Vector(['3']), constant_term='1')])
+if asyncio.run(solve_async(s)) != s.solve_system():
+    print ('async test case 3 failed')
+getcontext().prec = 30
+
+### Copies and in-place elimination
+
+rows = [[Decimal(1), Decimal(1), Decimal(1), Decimal(1)], [Decimal(0), Decimal(1), Decimal(0), Decimal(2)],
+        [Decimal(1), Decimal(1), Decimal(-1), Decimal(3)]]
+s = LinearSystem.from_matrix([list(row) for row in rows], 3)
+t = s.copy()
+if not (t.compute_rref(in_place=True) is t and s._matrix == rows and
+        [p.constant_term for p in t.planes] == [p.constant_term for p in s.compute_rref().planes]):
+    print ('copy test case 1 failed')
+s = LinearSystem([p0, p1, p2, p3])
+t = s.copy()
+t.swap_rows(0, 1)
+if not (s[0] is p0 and t[1] is p0 and s.compute_triangular_form(in_place=True) is s and s[0] is not p0):
+    print ('copy test case 2 failed')
+
+### Solution objects
+
+p1 = Plane(normal_vector=Vector(['0.786','0.786','0.588']), constant_term='-0.714')
+p2 = Plane(normal_vector=Vector(['-0.131','-0.131','0.244']), constant_term='0.319')
+s = LinearSystem([p1,p2])
+solution = s.compute_solution()
+if not (isinstance(solution, Parametrization) and solution.rank == 2 and
+        solution.pivots == [0, 2] and solution.free_variables == [1] and
+        len(solution.direction_vectors) == 1):
+    print ('solution test case 1 failed')
+for t in ('0', '1', '-2.5'):
+    point = solution.basepoint + solution.direction_vectors[0] * t
+    if not all(abs(p.normal_vector.dot(point) - p.constant_term) < 1e-20 for p in (p1, p2)):
+        print ('solution test case 2 failed')
+
+s = LinearSystem([Plane(normal_vector=Vector(['1','1','1']), constant_term='1'),
+                  Plane(normal_vector=Vector(['1','1','1']), constant_term='2')])
+if not (isinstance(s.compute_solution(), NoSolution) and not s.compute_solution().is_consistent):
+    print ('solution test case 3 failed')
+
+s = LinearSystem([Plane(normal_vector=Vector(['0','1','1']), constant_term='1'),
+                  Plane(normal_vector=Vector(['1','-1','1']), constant_term='2'),
+                  Plane(normal_vector=Vector(['1','2','-5']), constant_term='3')])
+solution = s.compute_solution()
+if not (isinstance(solution, UniqueSolution) and solution.rank == 3 and
+        list(solution.vector.coordinates) == s.solve_system()):
+    print ('solution test case 4 failed')
+
+### Batch solving on a process pool
+
+systems = [LinearSystem([Plane(normal_vector=Vector(['0','1','1']), constant_term=str(k)),
+                         Plane(normal_vector=Vector(['1','-1','1']), constant_term='2'),
+                         Plane(normal_vector=Vector(['1','2','-5']), constant_term='3')], backend=backend)
+           for k in range(5) for backend in ('decimal', 'float', 'fraction')]
+systems.append(LinearSystem([Plane(normal_vector=Vector(['1','1','1']), constant_term='1'),
+                             Plane(normal_vector=Vector(['1','1','1']), constant_term='2')]))
+systems.append(LinearSystem([SparseHyperplane(3, {0: '1', 1: '3'}, '2'), SparseHyperplane(3, {0: '1', 1: '1', 2: '-2'}, '0')]))
+expected = [s.solve_system() for s in systems]
+if solve_systems(iter(systems), processes=1) != expected:
+    print ('parallel test case 1 failed')
+# worker processes may re-import this module (the spawn start method), and
+# must not start pools of their own when they do
+if __name__ == '__main__' and solve_systems(systems, processes=2, chunksize=4) != expected:
+    print ('parallel test case 2 failed')
+
+### Incremental systems
+
+s = IncrementalLinearSystem(dimension=3)
+s.append(Plane(normal_vector=Vector(['0','1','1']), constant_term='1'))
+s.append(Plane(normal_vector=Vector(['1','-1','1']), constant_term='2'))
+if not (s.rank == 2 and s.pivots == [0, 1] and s.is_consistent() and
+        s.solve_system() == "Solution has infinitely many solutions"):
+    print ('incremental test case 1 failed')
+
+s.append(Plane(normal_vector=Vector(['0','2','2']), constant_term='2'))
+s.append(Plane(normal_vector=Vector(['1','2','-5']), constant_term='3'))
+if not (s.rank == 3 and
+        all(abs(x - y) < 1e-20 for x, y in zip(s.solve_system(), LinearSystem(list(s.planes)).solve_system()))):
+    print ('incremental test case 2 failed')
+
+del s[2]
+if not (len(s) == 3 and s.rank == 3):
+    print ('incremental test case 3 failed')
+
+s[0] = Plane(normal_vector=Vector(['1','-1','1']), constant_term='3')
+if not (s.rank == 2 and not s.is_consistent() and s.solve_system() == "System is Inconsistent"):
+    print ('incremental test case 4 failed')
+
+del s[0]
+if not (s.is_consistent() and s.rank == 2):
+    print ('incremental test case 5 failed')
+
+### Solve cache
+
+p1 = Plane(normal_vector=Vector(['0','1','1']), constant_term='1')
+p2 = Plane(normal_vector=Vector(['1','-1','1']), constant_term='2')
+p3 = Plane(normal_vector=Vector(['1','2','-5']), constant_term='3')
+expected = LinearSystem([p1,p2,p3]).solve_system()
+cache = SolveCache(maxsize=2)
+previous = set_solve_cache(cache)
+first = LinearSystem([p1,p2,p3]).solve_system()
+second = LinearSystem([p3,p1*-2,p2]).solve_system()
+LinearSystem([p1,p2]).solve_system()
+LinearSystem([p1,p3]).solve_system()
+set_solve_cache(previous)
+if not (first == expected and second == expected and
+        cache.hits == 1 and cache.misses == 3 and len(cache) == 2):
+    print ('solve cache test case 1 failed')
+
+### Loaders
+
+directory = tempfile.mkdtemp()
+def write_file(name, text):
+    path = os.path.join(directory, name)
+    with open(path, 'w') as f:
+        f.write(text)
+    return path
+
+expected = [Decimal('-1'), Decimal('3'), Decimal('-3')]
+csv_path = write_file('s.csv', '# 2x + y = 1\n2,1,0,1\n1,2,1,2\n\n0,1,0,3\n')
+text_path = write_file('s.txt', '2 1 0 1\n1  2 1 2\n0 1 0\t3\n')
+s = load_csv(csv_path, chunksize=2)
+if not (s.solve_system() == expected and load_text(text_path, mmap=True).solve_system() == expected and
+        s[2] == Hyperplane(normal_vector=Vector(['0','1','0']), constant_term='3')):
+    print ('loader test case 1 failed')
+
+binary_path = os.path.join(directory, 's.bin')
+write_binary(s, binary_path)
+if load_binary(binary_path, 3, backend='float').solve_system() != [-1.0, 3.0, -3.0]:
+    print ('loader test case 2 failed')
+
+mm_path = write_file('s.mtx', '%%MatrixMarket matrix coordinate integer symmetric\n% x_2 = 3\n3 3 4\n1 1 2\n2 1 1\n2 2 2\n3 2 1\n')
+constants_path = write_file('b.mtx', '%%MatrixMarket matrix array integer general\n3 1\n1\n2\n3\n')
+s = load_matrix_market(mm_path, constants=constants_path, backend='fraction')
+if not (s.solve_system() == [-1, 3, -3] and isinstance(s[0], SparseHyperplane)):
+    print ('loader test case 3 failed')
+
+skew_path = write_file('k.mtx', '%%MatrixMarket matrix array integer skew-symmetric\n2 2\n2\n')
+constants_path = write_file('c.mtx', '%%MatrixMarket matrix array integer general\n2 1\n2\n4\n')
+if load_matrix_market(skew_path, constants=constants_path).solve_system() != [2, -1]:
+    print ('loader test case 4 failed')
+
+d = DiskLinearSystem.from_chunks(iter_csv(csv_path, backend='float', chunksize=2), os.path.join(directory, 'chunks.bin'))
+if not (len(d) == 3 and d.solve_system() == [-1.0, 3.0, -3.0]):
+    print ('loader test case 5 failed')
+del d
+
+### Disk-backed systems
+
+s = load_csv(csv_path, backend='float')
+d = DiskLinearSystem.from_system(s, os.path.join(directory, 'disk.bin'), working_set=64)
+rref = d.compute_rref(output=os.path.join(directory, 'rref.bin'))
+if not (d.solve_system() == [-1.0, 3.0, -3.0] and
+        rref[2] == Hyperplane(normal_vector=Vector([0, 0, 1]), constant_term=-3, backend='float') and
+        os.path.exists(os.path.join(directory, 'rref.bin'))):
+    print ('disk test case 1 failed')
+
+d[2] = Plane(normal_vector=Vector(['4','2','0']), constant_term='2')
+if d.solve_system() != "Solution has infinitely many solutions":
+    print ('disk test case 2 failed')
+
+# the pivoting strategy goes first, as for LinearSystem, and a temporary
+# result file is gone once deleted
+files = set(os.listdir(directory))
+t = d.compute_triangular_form('partial')
+rref.delete()
+files.discard('rref.bin')
+rref = d.compute_rref('partial')
+if not (os.path.dirname(rref.path) == directory and not os.path.exists('partial') and
+        t[2].normal_vector.is_zero()):
+    print ('disk test case 3 failed')
+path = rref.path
+rref.delete()
+t.delete()
+if os.path.exists(path) or set(os.listdir(directory)) != files:
+    print ('disk test case 4 failed')
+
+del d
+shutil.rmtree(directory)
@@ -0,0 +1,299 @@
+"""
+Read linear systems from files without building a Vector or Plane per equation.
+
+Every reader parses straight into augmented matrix rows (see elimination.py)
+in the numbers of the requested backend, chunksize rows at a time, and the
+load_* functions hand the rows to LinearSystem.from_matrix. Planes are only
+made if something asks for system.planes afterwards.
+
+Only the iter_* readers stream. A system from load_* holds its whole
+augmented matrix as Python numbers, so for inputs that do not fit in
+memory write the chunks to disk as they come instead:
+
+    d = DiskLinearSystem.from_chunks(iter_csv('huge.csv', backend='float'), 'huge.bin')
+
+csv / text      one equation per line: the coefficients, then the constant
+                term. Blank lines and lines starting with # are skipped.
+matrix market   the augmented matrix as a Matrix Market file, or the
+                coefficients plus a separate file of constant terms.
+                coordinate files give a sparse system, array files a dense one.
+binary          raw row-major values, dimension + 1 per equation, with no
+                header. Little-endian float64 unless dtype says otherwise.
+
+With mmap=True the file is memory-mapped instead of read, so the operating
+system pages it in as the reader gets to it. For binary files this is the
+default.
+
+    s = load_csv('system.csv', backend='float')
+    for rows in iter_binary('system.bin', dimension=1000, chunksize=100):
+        ...
+"""
+
+import mmap as _mmap
+import sys
+from array import array
+from decimal import Decimal
+from fractions import Fraction
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from numeric import get_backend
+from sparse import SparseRow
+from linsys import LinearSystem
+
+DEFAULT_CHUNKSIZE = 4096
+
+RAGGED_ROWS_MSG = 'Every equation needs the same number of values'
+NOT_MATRIX_MARKET_MSG = 'Not a Matrix Market matrix file'
+UNSUPPORTED_MATRIX_MARKET_MSG = 'Unsupported Matrix Market format'
+WRONG_BINARY_SIZE_MSG = 'File size is not a whole number of equations'
+UNSUPPORTED_DTYPE_MSG = 'Unsupported binary dtype'
+
+# backend name -> what turns a string from a file into one of its numbers
+_PARSERS = {
+    'decimal': Decimal,
+    'float': float,
+    'fraction': Fraction,
+}
+
+# dtype -> array typecode, for reading binary files without NumPy
+_TYPECODES = {
+    '<f8': 'd',
+    '<f4': 'f',
+}
+
+
+def load_csv(path, backend=None, delimiter=',', chunksize=DEFAULT_CHUNKSIZE, mmap=False):
+    return _load(iter_csv(path, backend, delimiter, chunksize, mmap), backend)
+
+
+def load_text(path, backend=None, chunksize=DEFAULT_CHUNKSIZE, mmap=False):
+    return _load(iter_text(path, backend, chunksize, mmap), backend)
+
+
+def load_binary(path, dimension, backend=None, dtype='<f8', chunksize=DEFAULT_CHUNKSIZE, mmap=True):
+    return _load(iter_binary(path, dimension, backend, dtype, chunksize, mmap), backend, dimension)
+
+
+def iter_csv(path, backend=None, delimiter=',', chunksize=DEFAULT_CHUNKSIZE, mmap=False):
+    """
+    yields lists of up to chunksize augmented matrix rows
+    """
+    return _iter_delimited(path, backend, delimiter, chunksize, mmap)
+
+
+def iter_text(path, backend=None, chunksize=DEFAULT_CHUNKSIZE, mmap=False):
+    """
+    like iter_csv, with the values separated by any whitespace
+    """
+    return _iter_delimited(path, backend, None, chunksize, mmap)
+
+
+def iter_binary(path, dimension, backend=None, dtype='<f8', chunksize=DEFAULT_CHUNKSIZE, mmap=True):
+    """
+    yields lists of up to chunksize augmented matrix rows
+    """
+    backend = get_backend(backend)
+    width = dimension + 1
+
+    if np is not None:
+        dtype = np.dtype(dtype)
+        if mmap:
+            values = np.memmap(path, dtype=dtype, mode='r')
+        else:
+            values = np.fromfile(path, dtype=dtype)
+        if len(values) % width:
+            raise Exception(WRONG_BINARY_SIZE_MSG)
+        values = values.reshape(-1, width)
+        for start in range(0, len(values), chunksize):
+            # tolist() hands back Python floats, the float backend's own numbers
+            rows = values[start:start + chunksize].tolist()
+            yield _coerce_rows(rows, backend)
+        return
+
+    try:
+        typecode = _TYPECODES[dtype]
+    except KeyError:
+        raise Exception('{}: {}'.format(UNSUPPORTED_DTYPE_MSG, dtype))
+    row_bytes = width * array(typecode).itemsize
+    with open(path, 'rb') as f:
+        data = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ) if mmap else f.read()
+        try:
+            if len(data) % row_bytes:
+                raise Exception(WRONG_BINARY_SIZE_MSG)
+            for start in range(0, len(data), chunksize * row_bytes):
+                values = array(typecode)
+                values.frombytes(data[start:start + chunksize * row_bytes])
+                if sys.byteorder == 'big':
+                    values.byteswap()
+                rows = [values[k:k + width].tolist() for k in range(0, len(values), width)]
+                yield _coerce_rows(rows, backend)
+        finally:
+            if mmap:
+                data.close()
+
+
+def write_binary(system, path, dtype='<f8'):
+    """
+    writes system in the format iter_binary reads, one chunk at a time
+    """
+    with open(path, 'wb') as f:
+        rows = system._matrix_rows()
+        n = system.dimension
+        for start in range(0, len(rows), DEFAULT_CHUNKSIZE):
+            chunk = [[float(row[k]) for k in range(n)] + [float(row[-1])]
+                     for row in rows[start:start + DEFAULT_CHUNKSIZE]]
+            if np is not None:
+                f.write(np.array(chunk, dtype=dtype).tobytes())
+                continue
+            values = array(_TYPECODES[dtype], [x for row in chunk for x in row])
+            if sys.byteorder == 'big':
+                values.byteswap()
+            f.write(values.tobytes())
+
+
+def load_matrix_market(path, backend=None, constants=None, mmap=False):
+    """
+    without constants, the last column of the matrix holds the constant
+    terms. constants can name a second Matrix Market file with one column
+    of them, in which case every column of the first file is a coefficient.
+    """
+    backend = get_backend(backend)
+    rows, num_columns, sparse = _read_matrix_market(path, backend, mmap)
+
+    if constants is None:
+        dimension = num_columns - 1
+        if sparse:
+            for row in rows:
+                if dimension in row:
+                    row[-1] = row.pop(dimension)
+        return LinearSystem.from_matrix(rows, dimension, backend)
+
+    constant_rows, constant_columns, constants_sparse = _read_matrix_market(constants, backend, mmap)
+    if len(constant_rows) != len(rows) or constant_columns != 1:
+        raise Exception(RAGGED_ROWS_MSG)
+    for row, constant_row in zip(rows, constant_rows):
+        value = constant_row[0]
+        if not sparse:
+            row.append(value)
+        elif value != 0:
+            row[-1] = value
+    return LinearSystem.from_matrix(rows, num_columns, backend)
+
+
+def _read_matrix_market(path, backend, mmap):
+    """
+    (rows, number of columns, is sparse). Coordinate files become SparseRows
+    keyed by 0-based column, array files dense lists.
+    """
+    parse = _PARSERS.get(backend.name, backend.coerce)
+    zero = backend.zero
+    lines = _lines(path, mmap)
+    try:
+        header = next(lines).split()
+        if len(header) != 5 or header[0].lower() != '%%matrixmarket' or header[1].lower() != 'matrix':
+            raise Exception(NOT_MATRIX_MARKET_MSG)
+        layout, field, symmetry = [h.lower() for h in header[2:]]
+        if (layout not in ('coordinate', 'array') or field not in ('real', 'integer', 'pattern') or
+                symmetry not in ('general', 'symmetric', 'skew-symmetric')):
+            raise Exception('{}: {}'.format(UNSUPPORTED_MATRIX_MARKET_MSG, ' '.join(header[2:])))
+
+        entries = (line.split() for line in lines if line.strip() and not line.startswith('%'))
+        size = [int(v) for v in next(entries)]
+        num_rows, num_columns = size[0], size[1]
+        sign = -1 if symmetry == 'skew-symmetric' else 1
+
+        if layout == 'coordinate':
+            rows = [SparseRow(zero) for _ in range(num_rows)]
+            for entry in entries:
+                i, j = int(entry[0]) - 1, int(entry[1]) - 1
+                value = backend.one if field == 'pattern' else parse(entry[2])
+                rows[i][j] += value
+                if symmetry != 'general' and i != j:
+                    rows[j][i] += sign * value
+            for row in rows:
+                for j in [j for j, value in row.items() if value == 0]:
+                    del row[j]
+            return rows, num_columns, True
+
+        # array files list the values column by column, symmetric ones only
+        # the lower triangle of each column, and skew-symmetric ones only
+        # the part below the diagonal (which is zero)
+        rows = [[zero] * num_columns for _ in range(num_rows)]
+        values = (parse(entry[0]) for entry in entries)
+        for j in range(num_columns):
+            if symmetry == 'general':
+                start = 0
+            elif symmetry == 'symmetric':
+                start = j
+            else:
+                start = j + 1
+            for i in range(start, num_rows):
+                value = next(values)
+                rows[i][j] = value
+                if symmetry != 'general' and i != j:
+                    rows[j][i] = sign * value
+        return rows, num_columns, False
+    finally:
+        lines.close()
+
+
+def _iter_delimited(path, backend, delimiter, chunksize, mmap):
+    backend = get_backend(backend)
+    parse = _PARSERS.get(backend.name, backend.coerce)
+    width = None
+    rows = []
+    lines = _lines(path, mmap)
+    try:
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            row = [parse(v) for v in line.split(delimiter)]
+            if width is None:
+                width = len(row)
+            elif len(row) != width:
+                raise Exception(RAGGED_ROWS_MSG)
+            rows.append(row)
+            if len(rows) == chunksize:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+    finally:
+        lines.close()
+
+
+def _lines(path, mmap):
+    if not mmap:
+        with open(path) as f:
+            for line in f:
+                yield line
+        return
+
+    with open(path, 'rb') as f:
+        data = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ)
+        try:
+            for line in iter(data.readline, b''):
+                yield line.decode()
+        finally:
+            data.close()
+
+
+def _coerce_rows(rows, backend):
+    if backend.name == 'float':
+        return rows
+    coerce = backend.coerce
+    return [[coerce(v) for v in row] for row in rows]
+
+
+def _load(chunks, backend, dimension=None):
+    rows = []
+    for chunk in chunks:
+        rows.extend(chunk)
+    if dimension is None:
+        dimension = len(rows[0]) - 1 if rows else 0
+    return LinearSystem.from_matrix(rows, dimension, backend)
@@ -0,0 +1,125 @@
+from math import sqrt
+from decimal import Decimal, getcontext
+from fractions import Fraction
+
+getcontext().prec = 30
+
+
+class NumericBackend(object):
+    """
+    Describes the number type a Vector, Line, Plane or LinearSystem computes with.
+
+    coerce turns any incoming value (string, int, float, Decimal, Fraction)
+    into the backend's own type, and is_near_zero is the tolerance check every
+    "is this zero?" question goes through.
+    """
+
+    name = None
+    tolerance = 1e-10
+
+    def coerce(self, x):
+        raise NotImplementedError
+
+    def sqrt(self, x):
+        return self.coerce(sqrt(x))
+
+    def is_near_zero(self, x, eps=None):
+        return abs(x) < (self.tolerance if eps is None else eps)
+
+    @property
+    def zero(self):
+        return self.coerce(0)
+
+    @property
+    def one(self):
+        return self.coerce(1)
+
+    def __repr__(self):
+        return '<NumericBackend: {}>'.format(self.name)
+
+    def __reduce__(self):
+        # unpickle to the registered instance, so identity checks keep working
+        return (get_backend, (self.name,))
+
+
+class DecimalBackend(NumericBackend):
+    """
+    30 significant digits. This is how the library has always computed.
+    """
+
+    name = 'decimal'
+
+    def coerce(self, x):
+        if isinstance(x, Decimal):
+            return x
+        if isinstance(x, Fraction):
+            return Decimal(x.numerator) / Decimal(x.denominator)
+        return Decimal(x)
+
+
+class FloatBackend(NumericBackend):
+    """
+    native floats. Fastest, at the cost of float64 rounding.
+    """
+
+    name = 'float'
+
+    def coerce(self, x):
+        return float(x)
+
+
+class FractionBackend(NumericBackend):
+    """
+    exact rational arithmetic. Nothing gets rounded, so zero means exactly zero.
+    Square roots (magnitude, normalize, angle) are still only float accurate.
+    """
+
+    name = 'fraction'
+    tolerance = 0
+
+    def coerce(self, x):
+        if isinstance(x, Fraction):
+            return x
+        return Fraction(x)
+
+    def is_near_zero(self, x, eps=None):
+        if eps is None:
+            return x == 0
+        return abs(x) < eps
+
+
+BACKENDS = {
+    'decimal': DecimalBackend(),
+    'float': FloatBackend(),
+    'fraction': FractionBackend(),
+}
+
+UNKNOWN_BACKEND_MSG = 'Unknown numeric backend'
+
+_default_backend = BACKENDS['decimal']
+
+
+def get_backend(backend=None):
+    """
+    backend can be a name from BACKENDS, a NumericBackend instance,
+    or None for the global default
+    """
+    if backend is None:
+        return _default_backend
+    if isinstance(backend, NumericBackend):
+        return backend
+    try:
+        return BACKENDS[backend]
+    except KeyError:
+        raise Exception('{}: {}'.format(UNKNOWN_BACKEND_MSG, backend))
+
+
+def set_default_backend(backend):
+    """
+    changes the backend used by every object created without an explicit one.
+    returns the previous default so it can be restored.
+    """
+    global _default_backend
+    previous = _default_backend
+    _default_backend = get_backend(backend)
+    return previous
@@ -0,0 +1,102 @@
+"""
+Solve large batches of independent LinearSystems on a process pool.
+
+Systems never cross the process boundary as Plane/Vector/Decimal object
+graphs. Each one is flattened into a compact tuple of plain numbers
+(decimals and fractions as their exact strings), the worker rebuilds just
+the augmented matrix from it and runs the elimination engine directly, and
+the answer comes back in the same compact form.
+"""
+
+from multiprocessing import Pool
+
+from numeric import get_backend
+from elimination import reduced_row_echelon_form
+from sparse import SparseRow
+from solution import solution_from_rref, INCONSISTENT, INFINITELY_MANY
+
+DEFAULT_CHUNKSIZE = 256
+
+_UNIQUE = 'u'
+_INCONSISTENT = 'i'
+_INFINITE = 'p'
+
+
+def solve_systems(systems, processes=None, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    solves every system in systems (any iterable) and returns the results
+    in input order, each one what solve_system would have returned for it.
+
+    processes defaults to one per CPU; processes=1 solves in this process.
+    chunksize is how many systems each worker receives at a time.
+    """
+    payloads = (encode_system(s) for s in systems)
+    if processes == 1:
+        return [decode_result(solve_encoded(payload)) for payload in payloads]
+
+    pool = Pool(processes)
+    try:
+        return [decode_result(result) for result in pool.imap(solve_encoded, payloads, chunksize)]
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _encode_number(x, backend):
+    return x if backend.name == 'float' else str(x)
+
+
+def encode_system(system):
+    """
+    (backend name, dimension, is sparse, rows), where every row is
+    (coefficients, constant term) and sparse coefficients are (index, value) pairs
+    """
+    backend = system.backend
+    matrix = system._matrix_rows()
+    sparse = bool(matrix) and isinstance(matrix[0], SparseRow)
+    rows = []
+    for row in matrix:
+        if sparse:
+            coefficients = tuple((i, _encode_number(v, backend)) for i, v in row.items() if i != -1)
+        else:
+            coefficients = tuple(_encode_number(v, backend) for v in row[:-1])
+        rows.append((coefficients, _encode_number(row[-1], backend)))
+    return (backend.name, system.dimension, sparse, tuple(rows))
+
+
+def solve_encoded(payload):
+    """
+    runs in the worker: rebuilds the augmented matrix and solves it
+    """
+    backend_name, dimension, sparse, encoded_rows = payload
+    backend = get_backend(backend_name)
+    coerce = backend.coerce
+
+    rows = []
+    for coefficients, constant_term in encoded_rows:
+        if sparse:
+            row = SparseRow(backend.zero, [(i, coerce(v)) for i, v in coefficients])
+            constant_term = coerce(constant_term)
+            if constant_term != 0:
+                row[-1] = constant_term
+        else:
+            row = [coerce(v) for v in coefficients] + [coerce(constant_term)]
+        rows.append(row)
+
+    rows, pivots = reduced_row_echelon_form(rows, dimension, backend)
+    solution = solution_from_rref(rows, pivots, dimension, backend)
+    if not solution.is_consistent:
+        return (_INCONSISTENT, backend_name, ())
+    if not solution.is_unique:
+        return (_INFINITE, backend_name, ())
+    return (_UNIQUE, backend_name, tuple(_encode_number(x, backend) for x in solution.vector.coordinates))
+
+
+def decode_result(result):
+    kind, backend_name, coordinates = result
+    if kind == _INCONSISTENT:
+        return INCONSISTENT
+    if kind == _INFINITE:
+        return INFINITELY_MANY
+    backend = get_backend(backend_name)
+    return [backend.coerce(x) for x in coordinates]
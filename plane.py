@@ -1,137 +1,11 @@
-from decimal import Decimal, getcontext
+from hyperplane import Hyperplane
 
-from vector import Vector
 
-getcontext().prec = 30
+class Plane(Hyperplane):
+    """
+    a hyperplane in 3 dimensions
+    """
 
-
-class Plane(object):
-
-    NO_NONZERO_ELTS_FOUND_MSG = 'No nonzero elements found'
-
-    def __init__(self, normal_vector=None, constant_term=None):
-        self.dimension = 3
-
-        if not normal_vector:
-            all_zeros = ['0']*self.dimension
-            normal_vector = Vector(all_zeros)
-        self.normal_vector = normal_vector
-
-        if not constant_term:
-            constant_term = Decimal('0')
-        self.constant_term = Decimal(constant_term)
-
-        self.set_basepoint()
-
-    def __mul__(self, constant):
-      nvec = self.normal_vector * constant
-      const = self.constant_term * constant
-      return Plane(normal_vector=nvec, constant_term=const)
-
-    __rmul__ = __mul__
-
-
-    def set_basepoint(self):
-        try:
-            n = self.normal_vector.coordinates
-            c = self.constant_term
-            basepoint_coords = ['0']*self.dimension
-
-            initial_index = Plane.first_nonzero_index(list(n))
-            initial_coefficient = n[initial_index]
-
-            basepoint_coords[initial_index] = c/initial_coefficient
-            self.basepoint = Vector(basepoint_coords)
-
-        except Exception as e:
-            if str(e) == Plane.NO_NONZERO_ELTS_FOUND_MSG:
-                self.basepoint = None
-            else:
-                raise e
-
-
-    def __str__(self):
-
-        num_decimal_places = 3
-
-        def write_coefficient(coefficient, is_initial_term=False):
-            coefficient = round(coefficient, num_decimal_places)
-            if coefficient % 1 == 0:
-                coefficient = int(coefficient)
-
-            output = ''
-
-            if coefficient < 0:
-                output += '-'
-            if coefficient > 0 and not is_initial_term:
-                output += '+'
-
-            if not is_initial_term:
-                output += ' '
-
-            if abs(coefficient) != 1:
-                output += '{}'.format(abs(coefficient))
-
-            return output
-
-        n = self.normal_vector.coordinates
-
-        try:
-            initial_index = Plane.first_nonzero_index(list(n))
-            terms = [write_coefficient(n[i], is_initial_term=(i==initial_index)) + 'x_{}'.format(i+1)
-                     for i in range(self.dimension) if round(n[i], num_decimal_places) != 0]
-            output = ' '.join(terms)
-
-        except Exception as e:
-            if str(e) == self.NO_NONZERO_ELTS_FOUND_MSG:
-                output = '0'
-            else:
-                raise e
-
-        constant = round(self.constant_term, num_decimal_places)
-        if constant % 1 == 0:
-            constant = int(constant)
-        output += ' = {}'.format(constant)
-
-        return output
-
-    def __eq__(self, plane):
-      """
-      Two planes are the same if they are parallel AND
-      a vector connecting a point chosen on each plane
-      is orthogonal to the normal vectors of each plane.
-      """
-      if self.normal_vector.is_zero():
-        if not plane.normal_vector.is_zero():
-          return False
-        else:
-          diff = self.constant_term - plane.constant_term
-          return MyDecimal(diff).is_near_zero()
-      elif plane.normal_vector.is_zero():
-        return False
-
-      if not self.is_parallel_to(plane):
-        return False
-
-      connecting_vector = self.basepoint - plane.basepoint # just subtract basepoints to find a connecting vector
-      return connecting_vector.is_orthogonal_to(self.normal_vector) # because we already know they are parallel, we don't have to compare to each normal vector, just one
-
-
-    @staticmethod
-    def first_nonzero_index(iterable):
-        for k, item in enumerate(iterable):
-            if not MyDecimal(item).is_near_zero():
-                return k
-        raise Exception(Plane.NO_NONZERO_ELTS_FOUND_MSG)
-
-    def is_parallel_to(self, p):
-        """
-        Two planes are parallel if their normal vectors are parallel
-        """
-        normal1 = self.normal_vector
-        normal2 = p.normal_vector
-        return normal1.is_parallel_to(normal2)
-
-class MyDecimal(Decimal):
-    def is_near_zero(self, eps=1e-10):
-        return abs(self) < eps
\ No newline at end of file
+    def __init__(self, normal_vector=None, constant_term=None, backend=None):
+        super(Plane, self).__init__(dimension=3, normal_vector=normal_vector,
+                                    constant_term=constant_term, backend=backend)
@@ -0,0 +1,78 @@
+"""
+Zero, parallel and orthogonal tests from dot products and squared lengths,
+without square roots or trigonometry.
+
+Vector.is_parallel_to used to compare acos(round(cos, 10)) with 0 and pi.
+round(cos, 10) is +-1 exactly when |cos| >= PARALLEL_COSINE, and squaring
+both sides of |a . b| >= PARALLEL_COSINE |a| |b| gives the same test with
+nothing but multiplications:
+
+    zero        |a|^2 < tolerance^2                    (|a| < tolerance)
+    parallel    (a . b)^2 >= PARALLEL_COSINE^2 |a|^2 |b|^2, or either is zero
+    orthogonal  |a . b| < tolerance
+
+The scalar functions take numbers of any backend; the *_mask functions do
+the same for whole float64 arrays of them (see VectorBatch).
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from numeric import NumericBackend, get_backend
+
+PARALLEL_COSINE = 1 - 5e-11
+TOLERANCE = NumericBackend.tolerance
+
+_thresholds = {}
+
+
+def is_zero(squared_norm, backend=None):
+    tolerance = get_backend(backend).tolerance
+    if not tolerance:
+        return squared_norm == 0
+    return squared_norm < tolerance * tolerance
+
+
+def is_parallel(dot, squared_norm1, squared_norm2, backend=None):
+    """
+    parallel or antiparallel, given a . b, |a|^2 and |b|^2. The zero vector
+    is parallel to everything.
+    """
+    backend = get_backend(backend)
+    if is_zero(squared_norm1, backend) or is_zero(squared_norm2, backend):
+        return True
+    return dot * dot >= _threshold(backend) * squared_norm1 * squared_norm2
+
+
+def is_orthogonal(dot, backend=None):
+    return get_backend(backend).is_near_zero(dot)
+
+
+def zero_mask(squared_norms, tolerance=TOLERANCE):
+    return np.asarray(squared_norms) < tolerance * tolerance
+
+
+def parallel_mask(dots, squared_norms1, squared_norms2, tolerance=TOLERANCE):
+    dots = np.asarray(dots)
+    squared_norms1 = np.asarray(squared_norms1)
+    squared_norms2 = np.asarray(squared_norms2)
+    return (zero_mask(squared_norms1, tolerance) | zero_mask(squared_norms2, tolerance) |
+            (dots * dots >= PARALLEL_COSINE ** 2 * squared_norms1 * squared_norms2))
+
+
+def orthogonal_mask(dots, tolerance=TOLERANCE):
+    return np.abs(dots) < tolerance
+
+
+def _threshold(backend):
+    """
+    PARALLEL_COSINE^2 as a number of the backend, worked out once per backend
+    """
+    try:
+        return _thresholds[backend.name]
+    except KeyError:
+        cosine = backend.coerce(PARALLEL_COSINE)
+        _thresholds[backend.name] = cosine * cosine
+        return _thresholds[backend.name]
@@ -0,0 +1,109 @@
+"""
+Opt-in timings and operation counts for the solve pipeline.
+
+    with Profile() as p:
+        s.solve_system()
+    print(p.report())
+
+While a Profile is active, the elimination and the Vector / Hyperplane
+constructors record into it:
+
+phases      seconds spent in 'copy' (building the augmented matrix to
+            eliminate on), 'triangularization', 'pivot search' (part of
+            triangularization), 'back substitution', 'read solution',
+            'build planes' and 'first nonzero scan'
+counters    'row swaps', 'row scalings', 'row operations' (adding a
+            multiple of one row to another), 'vectors' and 'hyperplanes'
+            constructed, and '<backend> operations' (multiplications,
+            divisions and subtractions on the backend's numbers in the
+            list-based elimination, e.g. 'decimal operations')
+
+The float backend eliminates with NumPy matrix products, so it only gets
+phase timings and row swaps there. Nothing else is ever timed: with no
+Profile active, every hook is a single "is current() None" check.
+
+Profiles nest, the innermost one gets the records. The active Profile is
+kept in a context variable, so a Profile only records work done in the
+thread or asyncio task that entered it: solves running at the same time in
+other threads or tasks record into their own Profile, or into none.
+"""
+
+from collections import defaultdict
+from contextvars import ContextVar
+from time import perf_counter
+
+_current = ContextVar('profile', default=None)
+
+
+def current():
+    """
+    the innermost active Profile of this thread or task, or None
+    """
+    return _current.get()
+
+
+class Profile(object):
+
+    def __init__(self):
+        self.timings = defaultdict(float)
+        self.counts = defaultdict(int)
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _current.reset(self._token)
+        self._token = None
+        return False
+
+    def count(self, name, n=1):
+        self.counts[name] += n
+
+    def add_time(self, name, seconds):
+        self.timings[name] += seconds
+
+    def report(self):
+        lines = ['{:<24}{:>12.6f} s'.format(name, seconds) for name, seconds in sorted(self.timings.items())]
+        lines.extend('{:<24}{:>12}'.format(name, n) for name, n in sorted(self.counts.items()))
+        return '\n'.join(lines)
+
+
+def phase(name):
+    """
+    a context manager adding the time spent inside it to phase name of the
+    current Profile, if there is one
+    """
+    profile = _current.get()
+    if profile is None:
+        return _NO_PHASE
+    return _Phase(profile, name)
+
+
+class _Phase(object):
+
+    __slots__ = ('profile', 'name', 'start')
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.profile.add_time(self.name, perf_counter() - self.start)
+        return False
+
+
+class _NoPhase(object):
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_PHASE = _NoPhase()
@@ -0,0 +1,106 @@
+from vector import Vector
+
+INCONSISTENT = "System is Inconsistent"
+INFINITELY_MANY = "Solution has infinitely many solutions"
+
+
+class Solution(object):
+    """
+    what solving a LinearSystem found.
+
+    rank is the number of pivots in the RREF, and pivots[i] is the variable
+    that row i of the RREF leads with.
+
+    residual and condition_estimate are only filled in when the solve was
+    asked to check itself (see diagnostics.py), iterations only by the
+    iterative solvers.
+    """
+
+    is_consistent = True
+    is_unique = False
+    residual = None
+    condition_estimate = None
+    iterations = None
+
+    def __init__(self, dimension, pivots):
+        self.dimension = dimension
+        self.pivots = list(pivots)
+        self.rank = len(self.pivots)
+
+    @property
+    def free_variables(self):
+        pivots = set(self.pivots)
+        return [i for i in range(self.dimension) if i not in pivots]
+
+
+class UniqueSolution(Solution):
+
+    is_unique = True
+
+    def __init__(self, dimension, pivots, vector):
+        super(UniqueSolution, self).__init__(dimension, pivots)
+        self.vector = vector
+
+    def __str__(self):
+        return 'Unique solution: {}'.format(self.vector)
+
+
+class NoSolution(Solution):
+
+    is_consistent = False
+
+    def __str__(self):
+        return INCONSISTENT
+
+
+class Parametrization(Solution):
+    """
+    every solution is basepoint + t_1 * direction_vectors[0] + t_2 * direction_vectors[1] ...
+    with one direction vector (and one parameter t) per free variable.
+    """
+
+    def __init__(self, dimension, pivots, basepoint, direction_vectors):
+        super(Parametrization, self).__init__(dimension, pivots)
+        self.basepoint = basepoint
+        self.direction_vectors = direction_vectors
+
+    def __str__(self):
+        output = ''
+        for coord in range(self.dimension):
+            output += 'x_{} = {} '.format(coord + 1, round(self.basepoint.coordinates[coord], 3))
+            for free_var, vector in enumerate(self.direction_vectors):
+                output += '+ {} t_{}'.format(round(vector.coordinates[coord], 3), free_var + 1)
+            output += '\n'
+        return output
+
+
+def solution_from_rref(rows, pivots, dimension, backend):
+    """
+    reads the solution off a reduced augmented matrix (dense or sparse rows)
+    and the pivot columns of its leading rows
+    """
+    if not all(backend.is_near_zero(row[-1]) for row in rows[len(pivots):]):
+        # there is a 0 = N row left over. Inconsistent
+        return NoSolution(dimension, pivots)
+
+    basepoint = [backend.zero] * dimension
+    for row, variable_position in zip(rows, pivots):
+        basepoint[variable_position] = row[-1]
+
+    if len(pivots) == dimension:
+        return UniqueSolution(dimension, pivots, Vector(basepoint, backend))
+
+    # each free variable gets a direction: 1 in its own place, and minus its
+    # coefficient in every pivot row, since x_pivot = constant - sum(coefficient * x_free)
+    direction_vectors = []
+    pivot_set = set(pivots)
+    for free_variable in range(dimension):
+        if free_variable in pivot_set:
+            continue
+        direction = [backend.zero] * dimension
+        direction[free_variable] = backend.one
+        for row, variable_position in zip(rows, pivots):
+            direction[variable_position] = -row[free_variable]
+        direction_vectors.append(Vector(direction, backend))
+
+    return Parametrization(dimension, pivots, Vector(basepoint, backend), direction_vectors)
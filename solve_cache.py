@@ -0,0 +1,149 @@
+"""
+A bounded LRU cache of reduced row echelon forms, keyed by what the system
+means rather than how it was written down.
+
+Two systems get the same fingerprint when they have the same equations up
+to scaling and order: every row is divided by its first nonzero
+coefficient (the same comparison Plane.__eq__ makes), rounded to the
+backend's tolerance, and the rows are sorted. The RREF, and therefore the
+solution, does not depend on row order or row scaling, so a cached result
+answers for every system with that fingerprint, whatever order the caller
+listed the equations in.
+
+    previous = set_solve_cache(SolveCache(maxsize=1024))
+    s.solve_system()    # miss, eliminates
+    t.solve_system()    # t is s reordered and scaled: hit
+    set_solve_cache(previous)
+
+Only compute_rref, compute_solution and solve_system go through the cache.
+"""
+
+import sys
+from collections import OrderedDict
+from threading import Lock
+
+from sparse import SparseRow
+from elimination import copy_rows
+
+DEFAULT_MAXSIZE = 128
+
+_solve_cache = None
+
+
+def get_solve_cache():
+    return _solve_cache
+
+
+def set_solve_cache(cache):
+    """
+    puts cache (a SolveCache, or None to turn caching off) in front of every
+    LinearSystem. returns the previous one so it can be restored.
+    """
+    global _solve_cache
+    previous = _solve_cache
+    _solve_cache = cache
+    return previous
+
+
+class SolveCache(object):
+    """
+    keeps at most maxsize RREFs and, if max_memory is given, at most about
+    that many bytes of them. The least recently used entry goes first.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, max_memory=None):
+        self.maxsize = maxsize
+        self.max_memory = max_memory
+        self.hits = 0
+        self.misses = 0
+        self.memory = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return float(self.hits) / lookups if lookups else 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.memory = 0
+            self.hits = 0
+            self.misses = 0
+
+    def rref_matrix(self, system, compute):
+        """
+        the cached (rows, pivots) for system's fingerprint, or compute() if
+        there is none yet. Callers get their own copy of the rows.
+        """
+        key = fingerprint(system)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy_rows(entry[0]), list(entry[1])
+            self.misses += 1
+
+        rows, pivots = compute()
+        self._store(key, copy_rows(rows), list(pivots))
+        return rows, pivots
+
+    def _store(self, key, rows, pivots):
+        size = _estimate_size(key, rows)
+        if self.max_memory is not None and size > self.max_memory:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = (rows, pivots, size)
+            self.memory += size
+            while self._entries and (len(self._entries) > self.maxsize or
+                                     (self.max_memory is not None and self.memory > self.max_memory)):
+                _, evicted = self._entries.popitem(last=False)
+                self.memory -= evicted[2]
+
+
+def fingerprint(system):
+    """
+    (backend, dimension, sparse, sorted normalized rows). Each row is the tuple of
+    its (column, value) pairs with a nonzero value, the constant term
+    counting as column `dimension`.
+    """
+    backend = system.backend
+    n = system.dimension
+    tolerance = backend.tolerance
+    scale = backend.coerce(round(1 / tolerance)) if tolerance else None
+    matrix = system._matrix_rows()
+    sparse = bool(matrix) and isinstance(matrix[0], SparseRow)
+    rows = []
+    for row in matrix:
+        if sparse:
+            # the constant term is stored under -1, it goes last as column n
+            terms = sorted((k if k != -1 else n, v) for k, v in row.items())
+        else:
+            terms = enumerate(row)
+        terms = [(k, v) for k, v in terms if v != 0 and abs(v) >= tolerance]
+        if terms:
+            lead = terms[0][1]
+            if scale is None:
+                terms = [(k, v / lead) for k, v in terms]
+            else:
+                # round to the tolerance, so values that only differ in the noise share a key
+                terms = [(k, round(v / lead * scale)) for k, v in terms]
+        rows.append(tuple(terms))
+    rows.sort()
+    # sparse systems eliminate into SparseRows, so they get their own entries
+    return (backend.name, n, sparse, tuple(rows))
+
+
+def _estimate_size(key, rows):
+    size = sys.getsizeof(key) + sum(sys.getsizeof(row) for row in key[3])
+    for row in rows:
+        size += sys.getsizeof(row)
+        size += sum(sys.getsizeof(v) for v in (row.values() if isinstance(row, dict) else row))
+    return size
@@ -0,0 +1,251 @@
+"""
+Solving from asyncio code without blocking the event loop.
+
+    solution = await solve_async(system)
+
+returns what system.solve_system() would, but the elimination runs on a
+worker pool, under the decimal context the caller had when it asked.
+
+Square dense float systems solved with partial pivoting are micro-batched:
+requests of the same shape that arrive within max_latency seconds of each
+other go to the pool together, at most max_batch_size of them, and are
+solved as one stacked NumPy elimination instead of one elimination each.
+Any system in such a batch that turns out to have no unique solution is
+solved again on its own, so it is reported exactly as solve_system reports
+it. Every other request goes to the pool on its own straight away, since
+stacking gains nothing for it and waiting for the rest of a batch would
+only add latency.
+
+At most max_pending requests are queued or being solved at a time; more
+callers wait for a slot, which is the backpressure. A request cancelled
+before a worker picks it up is dropped. One that is already being solved
+finishes in the worker, and its result is thrown away.
+
+The default pool is a thread pool. Decimal and Fraction elimination holds
+the GIL, so to solve those on several cores at once pass a
+ProcessPoolExecutor; everything sent to the workers can be pickled.
+
+    async with SolveService(max_batch_size=128, max_latency=0.005) as service:
+        results = await asyncio.gather(*[service.solve(s) for s in systems])
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from decimal import getcontext, localcontext
+
+from numeric import get_backend
+from elimination import reduced_row_echelon_form, use_arrays, np
+from sparse import SparseRow
+from solution import solution_from_rref, INCONSISTENT, INFINITELY_MANY
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_LATENCY = 0.002
+DEFAULT_MAX_PENDING = 1024
+
+SERVICE_CLOSED_MSG = 'The solve service is closed'
+
+# one default SolveService per event loop
+_default_services = {}
+
+
+async def solve_async(system, pivoting='partial'):
+    """
+    system.solve_system(pivoting), solved by the default SolveService of
+    the running event loop
+    """
+    return await get_solve_service().solve(system, pivoting)
+
+
+def get_solve_service():
+    """
+    the default SolveService of the running event loop, made the first time
+    it is asked for. The ones of event loops that have since been closed
+    have their thread pools shut down here.
+    """
+    loop = asyncio.get_running_loop()
+    for other in [other for other in _default_services if other.is_closed()]:
+        _default_services.pop(other).executor.shutdown(wait=False)
+    service = _default_services.get(loop)
+    if service is None or service.closed:
+        service = _default_services[loop] = SolveService()
+    return service
+
+
+class SolveService(object):
+    """
+    batches solve requests by shape and runs them on executor (by default
+    a thread pool of max_workers threads, shut down by close)
+    """
+
+    def __init__(self, executor=None, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_latency=DEFAULT_MAX_LATENCY, max_pending=DEFAULT_MAX_PENDING, max_workers=None):
+        self._owns_executor = executor is None
+        self.executor = executor if executor is not None else ThreadPoolExecutor(max_workers)
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.max_pending = max_pending
+        self.closed = False
+        self._loop = None
+        self._slots = None
+        self._batches = {}
+        self._timers = {}
+        self._running = set()
+        self._pending = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+        return False
+
+    @property
+    def pending(self):
+        """
+        the number of requests queued or being solved
+        """
+        return self._pending
+
+    async def solve(self, system, pivoting='partial'):
+        if self.closed:
+            raise Exception(SERVICE_CLOSED_MSG)
+        if self._slots is None:
+            self._loop = asyncio.get_running_loop()
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        await self._slots.acquire()
+        self._pending += 1
+        try:
+            if self.closed:
+                raise Exception(SERVICE_CLOSED_MSG)
+            # the matrix is copied now, so later changes to system do not
+            # reach the worker
+            matrix = system._augmented_matrix()
+            context = getcontext().copy()
+            if not _can_stack(matrix, system.dimension, system.backend, pivoting):
+                results = await self._loop.run_in_executor(self.executor, solve_batch, [matrix], system.dimension,
+                                                           system.backend.name, pivoting, context)
+                return results[0]
+            key = (system.backend.name, len(matrix), system.dimension, pivoting, context.prec)
+            future = self._loop.create_future()
+
+            batch = self._batches.setdefault(key, [])
+            batch.append((matrix, future, context))
+            if len(batch) >= self.max_batch_size:
+                self._dispatch(key)
+            elif key not in self._timers:
+                self._timers[key] = self._loop.call_later(self.max_latency, self._dispatch, key)
+
+            return await future
+        finally:
+            self._pending -= 1
+            self._slots.release()
+
+    async def close(self):
+        """
+        sends every queued request to the pool, waits for all of them, and
+        shuts the pool down if the service made it
+        """
+        self.closed = True
+        for key in list(self._batches):
+            self._dispatch(key)
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        if self._owns_executor:
+            self.executor.shutdown(wait=True)
+
+    def _dispatch(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = [entry for entry in self._batches.pop(key, ()) if not entry[1].cancelled()]
+        if not batch:
+            return
+        backend_name, _, dimension, pivoting, _ = key
+        job = self._loop.run_in_executor(self.executor, solve_batch, [matrix for matrix, _, _ in batch],
+                                         dimension, backend_name, pivoting, batch[0][2])
+        task = self._loop.create_task(self._deliver(job, [future for _, future, _ in batch]))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _deliver(self, job, futures):
+        try:
+            results = await job
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
+
+
+def solve_batch(matrices, dimension, backend_name, pivoting='partial', context=None):
+    """
+    runs in the worker: what solve_system returns, for every augmented
+    matrix in matrices (all of the same shape), computed under the decimal
+    context (the worker's own if None)
+    """
+    with localcontext(context):
+        return _solve_batch(matrices, dimension, get_backend(backend_name), pivoting)
+
+
+def _can_stack(matrix, dimension, backend, pivoting):
+    return (use_arrays(backend) and pivoting == 'partial' and dimension > 0 and
+            len(matrix) == dimension and not isinstance(matrix[0], SparseRow))
+
+
+def _solve_batch(matrices, dimension, backend, pivoting):
+    results = [None] * len(matrices)
+    todo = range(len(matrices))
+
+    if len(matrices) > 1 and _can_stack(matrices[0], dimension, backend, pivoting):
+        stacked = np.array(matrices, dtype=np.float64).reshape(len(matrices), dimension, dimension + 1)
+        solutions, singular = solve_stacked(stacked, backend.tolerance)
+        for i, x in enumerate(solutions.tolist()):
+            if not singular[i]:
+                results[i] = x
+        todo = [i for i in todo if singular[i]]
+
+    for i in todo:
+        rows, pivots = reduced_row_echelon_form(matrices[i], dimension, backend, pivoting)
+        solution = solution_from_rref(rows, pivots, dimension, backend)
+        if not solution.is_consistent:
+            results[i] = INCONSISTENT
+        elif not solution.is_unique:
+            results[i] = INFINITELY_MANY
+        else:
+            results[i] = list(solution.vector.coordinates)
+    return results
+
+
+def solve_stacked(stacked, tolerance):
+    """
+    Gaussian elimination with partial pivoting on a B x n x (n + 1) stack of
+    square augmented matrices, all B at once. returns (solutions, singular):
+    a B x n array, and B bools that are True where some pivot was under
+    tolerance (those rows of solutions are meaningless)
+    """
+    a = stacked.copy()
+    count, n = a.shape[0], a.shape[1]
+    batch = np.arange(count)
+    singular = np.zeros(count, dtype=bool)
+    for col in range(n):
+        r = col + np.abs(a[:, col:, col]).argmax(axis=1)
+        pivot_rows = a[batch, r].copy()
+        a[batch, r] = a[batch, col]
+        a[batch, col] = pivot_rows
+
+        pivots = pivot_rows[:, col]
+        small = np.abs(pivots) < tolerance
+        singular |= small
+        pivots = np.where(small, 1.0, pivots)
+        multipliers = a[:, col + 1:, col] / pivots[:, np.newaxis]
+        a[:, col + 1:, col:] -= multipliers[:, :, np.newaxis] * pivot_rows[:, np.newaxis, col:]
+
+    x = np.zeros((count, n))
+    for i in reversed(range(n)):
+        diagonal = np.where(singular, 1.0, a[:, i, i])
+        x[:, i] = (a[:, i, n] - np.einsum('ij,ij->i', a[:, i, i + 1:n], x[:, i + 1:])) / diagonal
+    return x, singular
@@ -0,0 +1,308 @@
+"""
+Sparse equations and sparse Gaussian elimination.
+
+A sparse augmented matrix is a list of SparseRow, each one mapping column
+index -> nonzero value. Time and memory scale with the number of nonzeros,
+never with the number of variables, as long as nothing asks for the dense
+normal_vector of a SparseHyperplane.
+"""
+
+import heapq
+
+import profiling
+from numeric import get_backend
+from vector import Vector
+from hyperplane import Hyperplane, NOT_COMPUTED
+
+DEFAULT_PIVOT_THRESHOLD = 0.1
+
+
+class SparseRow(dict):
+    """
+    one equation of a sparse augmented matrix, {column: value}.
+
+    The constant term lives under key -1, so row[-1] reads the same for a
+    dense list row and a sparse one. Columns that are not stored read as zero.
+    """
+
+    def __init__(self, zero, *args, **kwargs):
+        super(SparseRow, self).__init__(*args, **kwargs)
+        self.zero = zero
+
+    def __missing__(self, key):
+        return self.zero
+
+
+class SparseHyperplane(Hyperplane):
+    """
+    a hyperplane that only stores its nonzero coefficients.
+
+    coefficients is either a {index: value} dict or a sequence of values.
+    normal_vector and basepoint are only built (densely) if something asks for them.
+    """
+
+    def __init__(self, dimension=None, coefficients=None, constant_term=None, backend=None, normal_vector=None):
+        if not dimension and not normal_vector:
+            raise Exception(self.EITHER_DIM_OR_NORMAL_VEC_MUST_BE_PROVIDED_MSG)
+
+        if backend is None and normal_vector:
+            backend = normal_vector.backend
+        self.backend = get_backend(backend)
+
+        if normal_vector:
+            dimension = dimension or normal_vector.dimension
+            coefficients = normal_vector.coordinates
+        if coefficients is None:
+            coefficients = {}
+        items = coefficients.items() if isinstance(coefficients, dict) else enumerate(coefficients)
+        self.dimension = dimension
+
+        coerce = self.backend.coerce
+        self.coefficients = {}
+        for i, value in items:
+            value = coerce(value)
+            if value != 0:
+                self.coefficients[i] = value
+
+        if not constant_term:
+            constant_term = '0'
+        self.constant_term = coerce(constant_term)
+
+        self._normal_vector = None
+        self._basepoint = NOT_COMPUTED
+        profile = profiling.current()
+        if profile is not None:
+            profile.count('hyperplanes')
+
+    @classmethod
+    def from_row(cls, row, dimension, backend):
+        coefficients = dict((k, v) for k, v in row.items() if k != -1)
+        return cls(dimension, coefficients, row[-1], backend)
+
+    def sparse_row(self):
+        row = SparseRow(self.backend.zero, self.coefficients)
+        if self.constant_term != 0:
+            row[-1] = self.constant_term
+        return row
+
+    @classmethod
+    def _from_internal(cls, normal_vector, constant_term):
+        return cls(normal_vector=normal_vector, constant_term=constant_term)
+
+    def with_backend(self, backend):
+        return SparseHyperplane(self.dimension, self.coefficients, self.constant_term, backend)
+
+    @property
+    def normal_vector(self):
+        if self._normal_vector is None:
+            zero = self.backend.zero
+            self._normal_vector = Vector([self.coefficients.get(i, zero) for i in range(self.dimension)], self.backend)
+        return self._normal_vector
+
+    def set_basepoint(self):
+        nonzero = [k for k, v in self.coefficients.items() if not self.backend.is_near_zero(v)]
+        if not nonzero:
+            self._basepoint = None
+            return
+        initial_index = min(nonzero)
+        basepoint_coords = ['0']*self.dimension
+        basepoint_coords[initial_index] = self.constant_term/self.coefficients[initial_index]
+        self._basepoint = Vector(basepoint_coords, self.backend)
+
+    def __mul__(self, constant):
+        constant = self.backend.coerce(constant)
+        coefficients = dict((k, v * constant) for k, v in self.coefficients.items())
+        return SparseHyperplane(self.dimension, coefficients, self.constant_term * constant, self.backend)
+
+    __rmul__ = __mul__
+
+
+class _SparseElimination(object):
+    """
+    bookkeeping for one sparse forward elimination: which active rows hold
+    each column, so a pivot only ever touches the rows it has to.
+    """
+
+    def __init__(self, rows, backend, threshold):
+        self.rows = rows
+        self.backend = backend
+        self.threshold = backend.coerce(threshold)
+        self.active = set(range(len(rows)))
+        self.col_rows = {}
+        for i, row in enumerate(rows):
+            for c in row:
+                if c != -1:
+                    self.col_rows.setdefault(c, set()).add(i)
+        self.touched = set()
+
+    def choose_row(self, col):
+        """
+        threshold pivoting: among the rows whose entry is at least threshold
+        times the largest one in the column, take the shortest row, since it
+        causes the least fill-in.
+        """
+        candidates = self.col_rows.get(col, ())
+        largest = max([abs(self.rows[i][col]) for i in candidates] or [0])
+        if self.backend.is_near_zero(largest):
+            return None
+        best = None
+        for i in candidates:
+            value = abs(self.rows[i][col])
+            if value >= self.threshold * largest and not self.backend.is_near_zero(value):
+                if best is None or (len(self.rows[i]), i) < (len(self.rows[best]), best):
+                    best = i
+        return best
+
+    def pivot(self, p, col):
+        """
+        eliminates col from every other active row using row p
+        """
+        rows, col_rows, is_near_zero = self.rows, self.col_rows, self.backend.is_near_zero
+        pivot_row = rows[p]
+        pivot_value = pivot_row[col]
+
+        self.active.discard(p)
+        for c in pivot_row:
+            if c != -1:
+                col_rows[c].discard(p)
+                self.touched.add(c)
+
+        for i in list(col_rows[col]):
+            row = rows[i]
+            multiple = row.pop(col) / pivot_value
+            col_rows[col].discard(i)
+            for c, v in pivot_row.items():
+                if c == col:
+                    continue
+                value = row[c] - multiple * v
+                if is_near_zero(value):
+                    if c in row:
+                        del row[c]
+                        if c != -1:
+                            col_rows[c].discard(i)
+                else:
+                    if c not in row and c != -1:
+                        # fill-in
+                        col_rows[c].add(i)
+                    row[c] = value
+                if c != -1:
+                    self.touched.add(c)
+
+
+def sparse_forward_eliminate(rows, num_variables, backend, ordering='markowitz', threshold=DEFAULT_PIVOT_THRESHOLD):
+    """
+    sparse counterpart of elimination.forward_eliminate, in place.
+
+    ordering='natural' eliminates the variables left to right, so the pivot
+    rows end up in triangular form. ordering='markowitz' always eliminates
+    the variable held by the fewest remaining rows next, which keeps fill-in
+    low; the pivot rows are then only triangular in that variable order.
+
+    Either way, pivot rows come first (in elimination order) followed by the
+    rows that have no coefficients left, and the pivot columns are returned.
+    """
+    state = _SparseElimination(rows, backend, threshold)
+    order = []
+    pivots = []
+
+    def eliminate(col):
+        p = state.choose_row(col)
+        if p is None:
+            return
+        state.pivot(p, col)
+        order.append(p)
+        pivots.append(col)
+
+    if ordering == 'natural':
+        for col in range(num_variables):
+            if state.col_rows.get(col):
+                eliminate(col)
+
+    elif ordering == 'markowitz':
+        done = set()
+        heap = [(len(s), c) for c, s in state.col_rows.items() if s]
+        heapq.heapify(heap)
+        while heap:
+            count, col = heapq.heappop(heap)
+            if col in done or count != len(state.col_rows[col]):
+                # stale entry, the column count changed since it was pushed
+                continue
+            done.add(col)
+            state.touched = set()
+            eliminate(col)
+            for c in state.touched - done:
+                if state.col_rows[c]:
+                    heapq.heappush(heap, (len(state.col_rows[c]), c))
+
+    else:
+        raise Exception('Unknown sparse ordering: {}'.format(ordering))
+
+    rows[:] = [rows[i] for i in order] + [rows[i] for i in sorted(state.active)]
+    return pivots
+
+
+def sparse_back_substitute(rows, pivots, backend):
+    """
+    sparse counterpart of elimination.back_substitute, in place.
+
+    Works for any elimination order: each pivot row holds no pivot column of
+    the rows chosen before it, so going backwards only ever has to remove
+    the current pivot column from the rows above. Afterwards rows and pivots
+    are sorted by pivot column, like a dense RREF.
+    """
+    num_pivots = len(pivots)
+    pivot_cols = set(pivots)
+    col_rows = {}
+    for k, row in enumerate(rows[:num_pivots]):
+        for c in row:
+            if c in pivot_cols:
+                col_rows.setdefault(c, set()).add(k)
+
+    for k in reversed(range(num_pivots)):
+        col = pivots[k]
+        row = rows[k]
+
+        pivot_value = row[col]
+        if pivot_value != 1:
+            for c in row:
+                row[c] = row[c] / pivot_value
+            row[col] = backend.one
+
+        for j in col_rows[col]:
+            if j >= k:
+                continue
+            above = rows[j]
+            multiple = above.pop(col)
+            for c, v in row.items():
+                if c == col:
+                    continue
+                value = above[c] - multiple * v
+                if backend.is_near_zero(value):
+                    above.pop(c, None)
+                else:
+                    above[c] = value
+
+    ordered = sorted(zip(pivots, rows[:num_pivots]), key=lambda pair: pair[0])
+    rows[:num_pivots] = [row for col, row in ordered]
+    pivots[:] = [col for col, row in ordered]
+
+
+def sparse_reduced_row_echelon_form(rows, num_variables, backend):
+    """
+    the RREF does not depend on elimination order, so eliminate in the
+    fill-reducing order first. With free variables that order can pivot on a
+    column that is not a row's leading term; in that case one more pass in
+    natural order over the (already reduced, so cheap) rows fixes it up.
+    """
+    with profiling.phase('triangularization'):
+        pivots = sparse_forward_eliminate(rows, num_variables, backend, ordering='markowitz')
+    with profiling.phase('back substitution'):
+        sparse_back_substitute(rows, pivots, backend)
+    if all(min(c for c in row if c != -1) == col for row, col in zip(rows, pivots)):
+        return pivots
+
+    with profiling.phase('triangularization'):
+        pivots = sparse_forward_eliminate(rows, num_variables, backend, ordering='natural')
+    with profiling.phase('back substitution'):
+        sparse_back_substitute(rows, pivots, backend)
+    return pivots
@@ -0,0 +1,254 @@
+"""
+An index over many lines, planes or hyperplanes, for finding the parallel and
+equal ones without comparing every pair.
+
+Each hyperplane goes into a grid cell keyed by its unit normal, rounded to
+the nearest multiple of DIRECTION_CELL, and within that cell into a bucket
+keyed by its offset (the signed distance from the origin along that unit
+normal). is_parallel_to accepts normals whose unit vectors are at most
+PARALLEL_RADIUS apart (the cosine rounds to +-1 at 10 decimal places), so a
+query only has to look at its own direction cell, the one of its negated
+normal, and the neighbouring cells across every cell edge that one of its
+coordinates lies within PARALLEL_RADIUS of. Zero and small coordinates sit
+in the middle of their cell, so a mostly-zero normal in many dimensions
+still has only a few such coordinates. A normal with more than
+MAX_NEIGHBOUR_CELLS neighbouring cells to try has the direction cells in
+the index scanned for them instead.
+Equal hyperplanes also have nearby offsets, so an equality query only looks
+at the offset buckets within reach.
+
+Every candidate the grid turns up is still checked with is_parallel_to or
+==, so the answers are exactly the ones the pairwise comparisons give, and
+deduplicating N hyperplanes costs about N lookups instead of N^2 / 2
+comparisons.
+
+    index = HyperplaneIndex(planes)
+    index.parallel_to(p)    # the indexed planes parallel to p
+    index.equal_to(p)       # the indexed planes equal to p
+    unique = deduplicate(planes)
+"""
+
+from itertools import product
+from math import floor, sqrt
+
+from vector import TOLERANCE
+
+DIRECTION_CELL = 1e-3
+PARALLEL_RADIUS = 1.1e-5
+MIN_OFFSET_CELL = 1e-8
+# float rounding in the offsets, relative to their size
+OFFSET_ROUNDING = 1e-12
+MAX_NEIGHBOUR_CELLS = 64
+
+
+def deduplicate(hyperplanes):
+    """
+    the hyperplanes with every one that equals an earlier one left out,
+    in their original order
+    """
+    index = HyperplaneIndex()
+    unique = []
+    for h in hyperplanes:
+        key = _key(h)
+        if index._first_equal_to(h, key) is None:
+            index._add(h, key)
+            unique.append(h)
+    return unique
+
+
+class HyperplaneIndex(object):
+    """
+    a growing collection of hyperplanes (Line, Plane, Hyperplane), any
+    numeric backend, answering "which of these are parallel to / equal to
+    this one". Hyperplanes with a zero normal vector are parallel to
+    everything, as with Vector.is_parallel_to.
+    """
+
+    def __init__(self, hyperplanes=()):
+        self.hyperplanes = []
+        self._directions = {}
+        self._zero = {}
+        for h in hyperplanes:
+            self.add(h)
+
+    def __len__(self):
+        return len(self.hyperplanes)
+
+    def __iter__(self):
+        return iter(self.hyperplanes)
+
+    def add(self, h):
+        """
+        adds h and returns its position in hyperplanes
+        """
+        return self._add(h, _key(h))
+
+    def _add(self, h, key):
+        position = len(self.hyperplanes)
+        self.hyperplanes.append(h)
+
+        if key is None:
+            self._zero.setdefault(_zero_cell(h), []).append(position)
+            return position
+
+        unit, offset, norm = key
+        slack = PARALLEL_RADIUS * _basepoint_size(h, norm)
+        cell = tuple([_cell(u) for u in unit])
+        bucket = self._directions.get(cell)
+        if bucket is None:
+            bucket = self._directions[cell] = _OffsetBucket(slack)
+        bucket.add(position, offset, slack)
+        return position
+
+    def parallel_to(self, h):
+        """
+        the indexed hyperplanes parallel to h, in the order they were added
+        """
+        key = _key(h)
+        if key is None:
+            return list(self.hyperplanes)
+        positions = [p for zero in self._zero.values() for p in zero]
+        for bucket, _ in self._buckets(key[0]):
+            positions.extend(bucket.positions())
+        return [self.hyperplanes[p] for p in sorted(set(positions))
+                if h.is_parallel_to(self.hyperplanes[p])]
+
+    def equal_to(self, h):
+        """
+        the indexed hyperplanes equal to h, in the order they were added
+        """
+        return [self.hyperplanes[p] for p in sorted(set(self._candidates(h, _key(h))))
+                if h == self.hyperplanes[p]]
+
+    def first_equal_to(self, h):
+        """
+        the hyperplane added first among those equal to h, or None
+        """
+        return self._first_equal_to(h, _key(h))
+
+    def _first_equal_to(self, h, key):
+        for p in sorted(set(self._candidates(h, key))):
+            if h == self.hyperplanes[p]:
+                return self.hyperplanes[p]
+        return None
+
+    def _candidates(self, h, key):
+        if key is None:
+            cell = _zero_cell(h)
+            return [p for c in (cell - 1, cell, cell + 1) for p in self._zero.get(c, ())]
+
+        unit, offset, norm = key
+        reach = TOLERANCE / norm + OFFSET_ROUNDING * abs(offset)
+        positions = []
+        for bucket, sign in self._buckets(unit):
+            positions.extend(bucket.near(sign * offset, reach))
+        return positions
+
+    def _buckets(self, unit):
+        """
+        (bucket, sign) for every direction cell that can hold a normal
+        parallel to unit, sign being -1 for the cells of -unit
+        """
+        seen = set()
+        for sign in (1, -1):
+            choices = []
+            neighbours = 1
+            for u in unit:
+                u = sign * u
+                cell = _cell(u)
+                options = [cell]
+                if u - (cell - 0.5) * DIRECTION_CELL < PARALLEL_RADIUS:
+                    options.append(cell - 1)
+                elif (cell + 0.5) * DIRECTION_CELL - u < PARALLEL_RADIUS:
+                    options.append(cell + 1)
+                neighbours *= len(options)
+                choices.append(options)
+            if neighbours > MAX_NEIGHBOUR_CELLS:
+                cells = [cell for cell in self._directions
+                         if all([c in options for c, options in zip(cell, choices)])]
+            else:
+                cells = product(*choices)
+            for cell in cells:
+                bucket = self._directions.get(cell)
+                if bucket is not None and cell not in seen:
+                    seen.add(cell)
+                    yield bucket, sign
+
+
+class _OffsetBucket(object):
+    """
+    the hyperplanes of one direction cell, grouped by offset into cells of
+    width size. slack is the largest distance two equal hyperplanes' offsets
+    can be apart on account of their normals being only nearly parallel;
+    the cells are kept at least twice that wide.
+    """
+
+    def __init__(self, slack):
+        self.size = max(MIN_OFFSET_CELL, 2 * slack)
+        self.slack = slack
+        self.count = 0
+        self.cells = {}
+
+    def add(self, position, offset, slack):
+        if slack > self.slack:
+            self.slack = slack
+            if 2 * slack > self.size:
+                self._resize(2 * slack)
+        self.cells.setdefault(int(floor(offset / self.size)), []).append((offset, position))
+        self.count += 1
+
+    def positions(self):
+        return [p for entries in self.cells.values() for _, p in entries]
+
+    def near(self, offset, reach):
+        """
+        the positions whose offsets are within reach + slack of offset
+        """
+        reach += self.slack
+        low = int(floor((offset - reach) / self.size))
+        high = int(floor((offset + reach) / self.size))
+        if high - low >= self.count:
+            entries = [e for entries in self.cells.values() for e in entries]
+        else:
+            entries = [e for c in range(low, high + 1) for e in self.cells.get(c, ())]
+        return [p for o, p in entries if abs(o - offset) <= reach]
+
+    def _resize(self, size):
+        entries = [e for entries in self.cells.values() for e in entries]
+        self.size = size
+        self.cells = {}
+        for offset, position in entries:
+            self.cells.setdefault(int(floor(offset / size)), []).append((offset, position))
+
+
+def _key(h):
+    """
+    (unit normal, offset, norm) of h in floats, or None if the normal vector
+    is zero
+    """
+    normal = h.normal_vector
+    if normal.is_zero():
+        return None
+    coordinates = [float(x) for x in normal.coordinates]
+    norm = sqrt(sum([x * x for x in coordinates]))
+    return [x / norm for x in coordinates], float(h.constant_term) / norm, norm
+
+
+def _cell(u):
+    return int(floor(u / DIRECTION_CELL + 0.5))
+
+
+def _basepoint_size(h, norm):
+    """
+    how far h.basepoint is from the origin, in units of the offset: Plane.__eq__
+    measures the gap between two planes at one plane's basepoint, so the
+    further out that point is, the more a slightly different normal moves it
+    """
+    for x in h.normal_vector.coordinates:
+        if not h.backend.is_near_zero(x):
+            return abs(float(h.constant_term) / float(x)) * (1 + OFFSET_ROUNDING)
+    return 0.0
+
+
+def _zero_cell(h):
+    return int(floor(float(h.constant_term) / (2 * TOLERANCE)))
@@ -1,16 +1,29 @@
-from math import sqrt, fsum, acos, degrees, pi
-from decimal import Decimal, getcontext
+from math import acos, degrees
+
+from numeric import get_backend
+import predicates
+import profiling
 
-getcontext().prec = 30
 TOLERANCE = 1e-10
 
 class Vector(object):
-    def __init__(self, coordinates):
+    """
+    Vectors are immutable, so anything derived from the coordinates alone
+    (magnitude, squared magnitude, unit vector, hash) is computed the first
+    time it is asked for and then kept.
+    """
+
+    __slots__ = ('coordinates', 'dimension', 'backend', '_magnitude', '_squared_magnitude', '_unit', '_hash')
+
+    CANNOT_NORMALIZE_ZERO_VECTOR_MSG = 'Cannot normalize the zero vector'
+    IMMUTABLE_MSG = 'Vectors are immutable'
+
+    def __init__(self, coordinates, backend=None):
+        backend = get_backend(backend)
         try:
             if not coordinates:
                 raise ValueError
-            self.coordinates = tuple([Decimal(x) for x in coordinates])
-            self.dimension = len(self.coordinates)
+            coordinates = tuple([backend.coerce(x) for x in coordinates])
 
         except ValueError:
             raise ValueError('The coordinates must be nonempty')
@@ -18,20 +31,45 @@ class Vector(object):
         except TypeError:
             raise TypeError('The coordinates must be an iterable')
 
+        # the cached slots (_magnitude, _squared_magnitude, _unit, _hash) stay unset until first use
+        _set_backend(self, backend)
+        _set_coordinates(self, coordinates)
+        _set_dimension(self, len(coordinates))
+        profile = profiling.current()
+        if profile is not None:
+            profile.count('vectors')
+
+    def __setattr__(self, name, value):
+        raise AttributeError(self.IMMUTABLE_MSG)
+
+    def __delattr__(self, name):
+        raise AttributeError(self.IMMUTABLE_MSG)
+
+    def __reduce__(self):
+        return (Vector, (self.coordinates, self.backend))
+
     def __str__(self):
         return 'Vector: {}'.format(self.coordinates)
 
     def __eq__(self, v):
         return self.coordinates == v.coordinates
 
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            object.__setattr__(self, '_hash', hash(self.coordinates))
+            return self._hash
+
     def __add__(self, v):
-        return Vector([ a + b for a, b in zip(self.coordinates, v.coordinates)])
+        return Vector([ a + b for a, b in zip(self.coordinates, v.coordinates)], self.backend)
 
     def __sub__(self, v):
-        return Vector([ a - b for a, b in zip(self.coordinates, v.coordinates)])
+        return Vector([ a - b for a, b in zip(self.coordinates, v.coordinates)], self.backend)
 
     def __mul__(self, scalar):
-        return Vector([ Decimal(scalar) * a for a in self.coordinates])
+        scalar = self.backend.coerce(scalar)
+        return Vector([ scalar * a for a in self.coordinates], self.backend)
 
     __rmul__ = __mul__ # this tells python what method to use when 2 * vector is used
 
@@ -39,7 +77,22 @@ class Vector(object):
         """
         Magnitude represents the length of the vector
         """
-        return Decimal(sqrt(sum([a ** 2 for a in self.coordinates])))
+        try:
+            return self._magnitude
+        except AttributeError:
+            object.__setattr__(self, '_magnitude', self.backend.sqrt(self.squared_magnitude()))
+            return self._magnitude
+
+    def squared_magnitude(self):
+        """
+        the dot product of the vector with itself; everything that only
+        compares lengths uses this and skips the square root
+        """
+        try:
+            return self._squared_magnitude
+        except AttributeError:
+            object.__setattr__(self, '_squared_magnitude', sum([a * a for a in self.coordinates]))
+            return self._squared_magnitude
 
 
     def normalize(self):
@@ -48,9 +101,14 @@ class Vector(object):
         the given vector
         """
         try:
-            return (Decimal('1.0') / self.magnitude()) * self
+            return self._unit
+        except AttributeError:
+            pass
+        try:
+            object.__setattr__(self, '_unit', (self.backend.one / self.magnitude()) * self)
         except ZeroDivisionError:
-            raise Exception('Cannot normalize the zero vector')
+            raise Exception(self.CANNOT_NORMALIZE_ZERO_VECTOR_MSG)
+        return self._unit
 
     def dot(self, v):
         """
@@ -78,19 +136,21 @@ class Vector(object):
             raise e
 
     def is_zero(self):
-        return self.magnitude() < TOLERANCE
+        return predicates.is_zero(self.squared_magnitude(), self.backend)
 
     def is_parallel_to(self, v):
         """
-        returns true if two vectors are parallel
+        returns true if two vectors are parallel: the angle between them
+        rounds to 0 or pi, worked out from the dot product and squared
+        magnitudes rather than with acos (see predicates.py)
         """
-        return (self.is_zero() or v.is_zero() or self.angle(v) == 0 or self.angle(v) == pi)
+        return predicates.is_parallel(self.dot(v), self.squared_magnitude(), v.squared_magnitude(), self.backend)
 
     def is_orthogonal_to(self, v):
         """
         returns true if two vectors are orthogonal to each other (up to a tolerance)
         """
-        return abs(self.dot(v)) < TOLERANCE
+        return predicates.is_orthogonal(self.dot(v), self.backend)
 
     def component_parallel_to(self, b):
         """
@@ -127,10 +187,17 @@ class Vector(object):
 
         x1, y1, z1 = self.coordinates
         x2, y2, z2 = v.coordinates
-        return Vector([(y1*z2 - y2 * z1), -(x1*z2 - x2*z1), (x1*y2 - x2*y1)])
+        return Vector([(y1*z2 - y2 * z1), -(x1*z2 - x2*z1), (x1*y2 - x2*y1)], self.backend)
 
     def parallelogram(self, v):
         return self.cross(v).magnitude()
 
     def triangle(self, v):
-        return 0.5 * self.cross(v).magnitude()
\ No newline at end of file
+        return self.backend.coerce('0.5') * self.cross(v).magnitude()
+
+
+# the slot descriptors write straight into the slots, skipping the immutable
+# __setattr__; noticeably cheaper than object.__setattr__ for every new Vector
+_set_backend = Vector.backend.__set__
+_set_coordinates = Vector.coordinates.__set__
+_set_dimension = Vector.dimension.__set__
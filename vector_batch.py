@@ -0,0 +1,171 @@
+from decimal import Decimal
+
+import numpy as np
+
+from vector import Vector, TOLERANCE
+from predicates import zero_mask, parallel_mask, orthogonal_mask
+
+
+class VectorBatch(object):
+    """
+    A batch of N vectors of the same dimension, stored as one contiguous
+    N x d float64 array.
+
+    Supports the same operations as Vector, but each one runs over the
+    whole batch at once. The other operand can be another VectorBatch of the
+    same size (paired up row by row) or a single Vector (used against every row).
+    """
+
+    ALL_VECTORS_MUST_BE_IN_SAME_DIM_MSG = 'All vectors in the batch should live in the same dimension'
+    BATCH_SIZES_MUST_MATCH_MSG = 'Both batches must hold the same number of vectors'
+    CANNOT_NORMALIZE_ZERO_VECTOR_MSG = 'Cannot normalize the zero vector'
+    ONLY_DEFINED_IN_THREE_DIMS_MSG = 'Cross product only supports vectors in 3 dimensions'
+
+    def __init__(self, coordinates):
+        try:
+            data = np.ascontiguousarray(coordinates, dtype=np.float64)
+            if data.ndim != 2 or data.shape[1] == 0:
+                raise ValueError
+            self.coordinates = data
+            self.dimension = data.shape[1]
+
+        except ValueError:
+            raise ValueError('The coordinates must be a nonempty N x d array')
+
+    @classmethod
+    def from_vectors(cls, vectors):
+        vectors = list(vectors)
+        try:
+            d = vectors[0].dimension
+            for v in vectors:
+                assert v.dimension == d
+        except AssertionError:
+            raise Exception(cls.ALL_VECTORS_MUST_BE_IN_SAME_DIM_MSG)
+        except IndexError:
+            raise ValueError('The coordinates must be nonempty')
+
+        data = np.empty((len(vectors), d), dtype=np.float64)
+        for i, v in enumerate(vectors):
+            data[i] = [float(x) for x in v.coordinates]
+        return cls(data)
+
+    def to_vectors(self):
+        """
+        Decimal(float) is exact, so a batch -> vectors -> batch round trip
+        gives back the same float64 values bit for bit.
+        """
+        return [Vector([Decimal(x) for x in row]) for row in self.coordinates.tolist()]
+
+    def __len__(self):
+        return self.coordinates.shape[0]
+
+    def __getitem__(self, i):
+        return Vector([Decimal(x) for x in self.coordinates[i].tolist()])
+
+    def __str__(self):
+        return 'VectorBatch: {} vectors in {} dimensions'.format(len(self), self.dimension)
+
+    def __eq__(self, v):
+        return self.coordinates.shape == v.coordinates.shape and np.array_equal(self.coordinates, v.coordinates)
+
+    def _other(self, v):
+        """
+        returns the coordinates of v in a shape that broadcasts against this batch
+        """
+        if isinstance(v, VectorBatch):
+            if len(v) != len(self):
+                raise Exception(self.BATCH_SIZES_MUST_MATCH_MSG)
+            return v.coordinates
+        return np.array([float(x) for x in v.coordinates], dtype=np.float64)
+
+    def _scalars(self, scalars):
+        """
+        one scalar for the whole batch, or one scalar per vector
+        """
+        s = np.asarray(scalars, dtype=np.float64)
+        return s[:, np.newaxis] if s.ndim == 1 else s
+
+    def __add__(self, v):
+        return VectorBatch(self.coordinates + self._other(v))
+
+    def __sub__(self, v):
+        return VectorBatch(self.coordinates - self._other(v))
+
+    def __mul__(self, scalars):
+        return VectorBatch(self._scalars(scalars) * self.coordinates)
+
+    __rmul__ = __mul__
+
+    def magnitude(self):
+        """
+        an array holding the length of each vector
+        """
+        return np.sqrt(_dot(self.coordinates, self.coordinates))
+
+    def normalize(self):
+        return VectorBatch(_unit(self.coordinates))
+
+    def dot(self, v):
+        """
+        an array holding the dot product of each vector with v
+        """
+        return _dot(self.coordinates, self._other(v))
+
+    def angle(self, v, in_degrees=False):
+        """
+        same rounding to 10 places as Vector.angle before taking acos
+        """
+        cosines = _dot(_unit(self.coordinates), _unit(self._other(v)))
+        radians = np.arccos(np.round(cosines, 10))
+        return np.degrees(radians) if in_degrees else radians
+
+    def squared_magnitude(self):
+        return _dot(self.coordinates, self.coordinates)
+
+    def is_zero(self):
+        return zero_mask(self.squared_magnitude(), TOLERANCE)
+
+    def is_parallel_to(self, v):
+        """
+        an array of bools, the same test as Vector.is_parallel_to
+        """
+        other = self._other(v)
+        return parallel_mask(_dot(self.coordinates, other), self.squared_magnitude(), _dot(other, other), TOLERANCE)
+
+    def is_orthogonal_to(self, v):
+        return orthogonal_mask(self.dot(v), TOLERANCE)
+
+    def component_parallel_to(self, b):
+        unit_b = _unit(self._other(b))
+        return VectorBatch(_dot(self.coordinates, unit_b)[:, np.newaxis] * unit_b)
+
+    def component_orthogonal_to(self, b):
+        return self - self.component_parallel_to(b)
+
+    def cross(self, v):
+        other = self._other(v)
+        if self.dimension != 3 or other.shape[-1] != 3:
+            raise Exception(self.ONLY_DEFINED_IN_THREE_DIMS_MSG)
+        return VectorBatch(np.cross(self.coordinates, other))
+
+    def parallelogram(self, v):
+        return self.cross(v).magnitude()
+
+    def triangle(self, v):
+        return 0.5 * self.cross(v).magnitude()
+
+
+def _dot(a, b):
+    """
+    row-wise dot product; b is either one row per vector in a, or a single row
+    """
+    if b.ndim == 1:
+        return a.dot(b)
+    return np.einsum('ij,ij->i', a, b)
+
+
+def _unit(coordinates):
+    mags = np.sqrt(_dot(coordinates, coordinates) if coordinates.ndim == 2 else coordinates.dot(coordinates))
+    if np.any(mags == 0):
+        raise Exception(VectorBatch.CANNOT_NORMALIZE_ZERO_VECTOR_MSG)
+    return coordinates / (mags[:, np.newaxis] if coordinates.ndim == 2 else mags)
@@ -0,0 +1,62 @@
+from vector import Vector
+from vector_batch import VectorBatch
+from intersection_batch import intersect_lines, intersect_planes
+
+v1 = Vector(['8.218', '-9.341', '1.5'])
+v2 = Vector(['-1.129', '2.111', '-0.5'])
+v3 = Vector(['3', '4', '0'])
+
+b = VectorBatch.from_vectors([v1, v3])
+if not (len(b) == 2 and b.dimension == 3):
+    print ('vector batch test case 1 failed')
+
+if not VectorBatch.from_vectors(b.to_vectors()) == b:
+    print ('vector batch test case 2 failed')
+
+if not abs(b.magnitude()[1] - 5) < 1e-10:
+    print ('vector batch test case 3 failed')
+
+s = b + v2
+if not all(abs(float(x) - float(y)) < 1e-10 for x, y in zip(s[0].coordinates, (v1 + v2).coordinates)):
+    print ('vector batch test case 4 failed')
+
+if not abs(b.dot(v2)[0] - float(v1.dot(v2))) < 1e-10:
+    print ('vector batch test case 5 failed')
+
+if not abs(b.angle(v2)[0] - v1.angle(v2)) < 1e-10:
+    print ('vector batch test case 6 failed')
+
+c = b.cross(VectorBatch.from_vectors([v2, v2]))
+if not all(abs(float(x) - float(y)) < 1e-10 for x, y in zip(c[0].coordinates, v1.cross(v2).coordinates)):
+    print ('vector batch test case 7 failed')
+
+par = b.component_parallel_to(v2)
+orth = b.component_orthogonal_to(v2)
+if not (all(abs(x) < 1e-10 for x in orth.dot(v2)) and ((par + orth) - b).magnitude().max() < 1e-10):
+    print ('vector batch test case 8 failed')
+
+if not abs((b * [2, 0.5]).magnitude()[1] - 2.5) < 1e-10:
+    print ('vector batch test case 9 failed')
+
+p = VectorBatch([[1, 2, 3], [1, 0, 0], [0, 0, 0]])
+if not (list(p.is_parallel_to(Vector(['-2', '-4', '-6']))) == [True, False, True] and
+        list(p.is_orthogonal_to(v3)) == [False, False, True] and list(p.is_zero()) == [False, False, True]):
+    print ('vector batch test case 10 failed')
+
+### Batched intersections
+
+points, parallel, coincident = intersect_lines([[4.046, 2.836], [7.204, 3.182], [1.182, 5.562]],
+                                               [1.21, 8.68, 6.744],
+                                               [[10.115, 7.09], [8.172, 4.114], [1.773, 8.343]],
+                                               [3.025, 9.883, 9.525])
+if not (list(parallel) == [True, False, True] and list(coincident) == [True, False, False] and
+        abs(points[1][0] - 1.17277663546) < 1e-10 and abs(points[1][1] - 0.07269551166) < 1e-10):
+    print ('intersection batch test case 1 failed')
+
+points, parallel, coincident = intersect_planes([[[0, 1, 1], [1, -1, 1], [1, 2, -5]],
+                                                 [[1, 1, 1], [1, 1, 1], [0, 1, 0]],
+                                                 [[1, 1, 1], [2, 2, 2], [0, 1, 0]]],
+                                                [[1, 2, 3], [1, 2, 0], [1, 2, 0]])
+if not (list(parallel) == [False, True, True] and list(coincident) == [False, False, True] and
+        all(abs(x - y) < 1e-10 for x, y in zip(points[0], [23/9., 7/9., 2/9.]))):
+    print ('intersection batch test case 2 failed')